@@ -1,177 +1,1810 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
-from dotenv import load_dotenv
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, g, has_app_context, send_file
+from flask.json.provider import DefaultJSONProvider
+import base64
+import bisect
+import functools
+import gzip
+import hashlib
+import heapq
+import hmac
 import json
+import mimetypes
+import mmap
 import os
 import random
 import re
 import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from contextlib import contextmanager
 from pathlib import Path
-import numpy as np
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.utils import safe_join
 
 
 try:
-    import kagglehub
+    import fcntl
 except ImportError:
-    kagglehub = None
+    fcntl = None
 
-load_dotenv()
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Time spent in each startup stage, in seconds, recorded the first time it runs
+startup_timings = {}
+
+
+@contextmanager
+def startup_stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings.setdefault(name, time.perf_counter() - started)
+
+
+class LazyModule:
+    """Stand-in for a top-level module that is only imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with startup_stage(f'import {self._name}'):
+                self._module = __import__(self._name)
+        # Later lookups of the same name skip __getattr__ entirely
+        value = self.__dict__[attr] = getattr(self._module, attr)
+        return value
+
+
+# numpy is only needed once the recommendation model is built
+np = LazyModule('numpy')
+
+# Settings from a .env file next to the app; python-dotenv is only imported
+# when there is one
+DOTENV_FILE = Path(__file__).with_name('.env')
+if DOTENV_FILE.exists():
+    with startup_stage('load .env'):
+        from dotenv import load_dotenv
+        load_dotenv(DOTENV_FILE)
+
+class CatalogJSONProvider(DefaultJSONProvider):
+    """JSON provider that also encodes read-only mappings such as ScoredItem"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Mapping):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__)
+app.json = CatalogJSONProvider(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production-2024')
 
 
 
+# Metrics
+# Timings and counters exposed on /metrics in the Prometheus text format
+METRIC_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def metric_labels(names, values):
+    """{a="1",b="2"} for label names and values, or '' without labels"""
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Histogram:
+    """Prometheus-style histogram of durations in seconds, one series per label combination"""
+
+    def __init__(self, name, help_text, label_names=(), buckets=METRIC_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(labels, time.perf_counter() - started)
+
+    def totals(self):
+        """{labels: (sum, count)} for every series"""
+        with self._lock:
+            return {labels: (series[1], series[2]) for labels, series in self._series.items()}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = metric_labels(self.label_names + ('le',), labels + (repr(bound),))
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{self.name}_bucket{metric_labels(self.label_names + ("le",), labels + ("+Inf",))} {count}')
+            lines.append(f'{self.name}_sum{metric_labels(self.label_names, labels)} {total}')
+            lines.append(f'{self.name}_count{metric_labels(self.label_names, labels)} {count}')
+        return lines
+
+
+def render_samples(name, metric_type, help_text, samples, label_names=()):
+    """Text format lines for a gauge or counter from [(label values, value), ...]"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for labels, value in samples:
+        lines.append(f'{name}{metric_labels(label_names, labels)} {value}')
+    return lines
+
+
+request_seconds = Histogram('ayushastra_request_seconds', 'Time to handle a request, by route',
+                            ('endpoint', 'method', 'status'))
+model_stage_seconds = Histogram('ayushastra_model_stage_seconds',
+                                'Time spent in each recommendation scoring stage', ('stage',))
+prediction_seconds = Histogram('ayushastra_prediction_seconds', 'Time to score one recommendation request')
+storage_seconds = Histogram('ayushastra_storage_seconds', 'Time spent in storage backend calls',
+                            ('operation',))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    # Streamed responses are timed up to the point their body starts
+    started = g.pop('request_started', None)
+    if started is not None:
+        request_seconds.observe((request.endpoint or 'unmatched', request.method, str(response.status_code)),
+                                time.perf_counter() - started)
+    return response
+
+
+def get_local_pose_matches(query, limit=6):
+    """Return basic pose matches using improved keyword search."""
+    query_lower = query.lower().strip()
+    if not query_lower:
+        return []
+    
+    # Scored by the same engine as /api/search, but any word may match
+    _, top = current_catalog().search_index.catalogs['yoga'].rank(query_lower, limit, require_all_words=False)
+    
+    return [slim_projection('yoga', pose) for _, pose in top]
+
+class CatalogRecord(dict):
+    """Read-only catalog item shared by every request.
+
+    Still a dict, so templates and JSON encoding treat it as before, but any
+    attempt to modify it raises TypeError. List fields are stored as tuples.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Catalog records are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (CatalogRecord, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze_record(item):
+    """Return item as a CatalogRecord, with list fields turned into tuples"""
+    return CatalogRecord({
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in item.items()
+    })
+
+
+class ScoredItem(Mapping):
+    """Per-request view of a catalog record carrying its confidence score.
+
+    Reads through to the shared record, so results never copy or modify it.
+    """
+
+    __slots__ = ('record', 'confidence_score')
+
+    def __init__(self, record, confidence_score):
+        self.record = record
+        self.confidence_score = confidence_score
+
+    def __getitem__(self, key):
+        if key == 'confidence_score':
+            return self.confidence_score
+        return self.record[key]
+
+    def __iter__(self):
+        yield from self.record
+        if 'confidence_score' not in self.record:
+            yield 'confidence_score'
+
+    def __len__(self):
+        return len(self.record) + ('confidence_score' not in self.record)
+
+
+# Load data
+CATALOG_FILES = ('data/yoga_poses.json', 'data/ayurvedic_remedies.json', 'data/pranayama_exercises.json')
+
+def load_data():
+    """Return the three catalogs and a short content hash of their files.
+
+    The catalogs come from the binary snapshot when one was built from the
+    current files, and are parsed from the JSON otherwise.
+    """
+    digest = hashlib.sha1()
+    raw_files = []
+    for path in CATALOG_FILES:
+        with open(path, 'rb') as f:
+            raw_files.append(f.read())
+        digest.update(raw_files[-1])
+    version = digest.hexdigest()[:12]
+    
+    snapshot = open_catalog_snapshot(CATALOG_SNAPSHOT_FILE, version)
+    if snapshot is not None:
+        catalogs = snapshot.catalogs()
+    else:
+        catalogs = [[freeze_record(item) for item in json.loads(raw)] for raw in raw_files]
+    
+    yoga_poses, ayurvedic_remedies, pranayama_exercises = catalogs
+    return yoga_poses, ayurvedic_remedies, pranayama_exercises, version
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def fuzzy_words(text):
+    """Lowercased alphanumeric words of text"""
+    return NON_WORD.sub(' ', text.lower()).split()
+
+
+# Condition Vocabulary
+# Conditions are free text repeated in every record, with spelling variants
+# ("Back Pain"/"Back pain") and synonyms. They are folded onto canonical
+# conditions with integer ids, so a set of conditions is an int bitmask and
+# two sets overlap in popcount(a & b) conditions.
+# CONDITION_FOLDING=0 turns the folding off: conditions then only match
+# in exactly the same spelling, as they did before the vocabulary
+CONDITION_FOLDING = os.environ.get('CONDITION_FOLDING', '1') == '1'
+# Synonyms folded onto one condition, both sides normalized
+CONDITION_ALIASES = {
+    'headaches': 'headache',
+    'hypothyroid': 'hypothyroidism',
+    'hypertension': 'high blood pressure',
+    'hair fall': 'hair loss',
+    'ibs': 'irritable bowel syndrome',
+    'uti': 'urinary tract infections',
+    'common cold': 'cold',
+    'poor blood circulation': 'poor circulation',
+    'low back stiffness': 'lower back stiffness',
+    'poor lung capacity': 'low lung capacity',
+    'poor immunity': 'low immunity',
+    'weak core': 'core weakness',
+}
+
+
+def normalize_condition(text):
+    """Lowercased words of a condition with punctuation dropped and aliases folded"""
+    if not CONDITION_FOLDING:
+        return text
+    key = ' '.join(fuzzy_words(text.replace('&', ' and ')))
+    return CONDITION_ALIASES.get(key, key)
+
+
+class ConditionVocabulary:
+    """Canonical conditions with integer ids, built from every condition list at load time.
+
+    Each canonical condition is shown with its most common spelling (the
+    first one seen on a tie). Unknown conditions have no id and add
+    nothing to a mask.
+    """
+
+    def __init__(self, condition_lists):
+        self.ids = {}
+        spellings = []
+        for conditions in condition_lists:
+            for cond in conditions:
+                key = normalize_condition(cond)
+                if key not in self.ids:
+                    self.ids[key] = len(spellings)
+                    spellings.append({})
+                counts = spellings[self.ids[key]]
+                counts[cond] = counts.get(cond, 0) + 1
+        # max() keeps the first of equally common spellings, in first-seen order
+        self.names = [max(counts, key=counts.get) for counts in spellings]
+        self._id_for = functools.lru_cache(maxsize=4096)(self._lookup)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _lookup(self, condition):
+        return self.ids.get(normalize_condition(condition))
+
+    def id(self, condition):
+        """Id of a condition in any spelling, or None"""
+        return self._id_for(condition)
+
+    def canonical(self, condition):
+        """Canonical spelling of a condition, or the condition itself when unknown"""
+        condition_id = self.id(condition)
+        return condition if condition_id is None else self.names[condition_id]
+
+    def mask(self, conditions):
+        """Bitmask with the bit of each known condition set"""
+        mask = 0
+        for cond in conditions:
+            condition_id = self.id(cond)
+            if condition_id is not None:
+                mask |= 1 << condition_id
+        return mask
+
+
+def mask_bits(mask):
+    """Ids of the set bits of a mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# Search Index
+# Fields tokenized per catalog, on top of conditions and benefits. These mirror
+# the fields each catalog has always been searched on.
+SEARCH_FIELDS = {
+    'yoga': ('name', 'sanskrit_name', 'category', 'subcategory'),
+    'remedies': ('name', 'herb_name', 'category', 'description'),
+    'pranayama': ('name', 'sanskrit_name'),
+}
+
+EMPTY_POSTING = frozenset()
+
+# Fields whose words are matched approximately when a query has no exact
+# matches (or always, with fuzzy=blend), together with each item's conditions
+FUZZY_FIELDS = ('name', 'sanskrit_name', 'herb_name')
+# Words sharing less of their trigrams than this with a query word are ignored,
+# and items whose query words match less than FUZZY_MIN_SIMILARITY on average
+# are left out
+FUZZY_WORD_SIMILARITY = 0.3
+FUZZY_MIN_SIMILARITY = 0.5
+# Score a perfect approximate match adds in blended ranking, about an exact
+# condition match
+FUZZY_SCORE_WEIGHT = 15
+SEARCH_FUZZY_MODES = ('off', 'fallback', 'blend')
+SEARCH_FUZZY_DEFAULT = os.environ.get('SEARCH_FUZZY', 'fallback')
+if SEARCH_FUZZY_DEFAULT not in SEARCH_FUZZY_MODES:
+    app.logger.warning("Unknown SEARCH_FUZZY %r, using 'fallback'", SEARCH_FUZZY_DEFAULT)
+    SEARCH_FUZZY_DEFAULT = 'fallback'
+
+
+def trigrams(word):
+    """Character trigrams of a lowercased word, padded so its start and end count twice"""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Words found by trigram similarity, without comparing the query against every word.
+
+    Each word is stored once with the positions of the items it occurs in.
+    A lookup only visits the words sharing at least one trigram with the
+    query word, counting the shared trigrams from the postings, and scores
+    them with the Dice coefficient 2 * shared / (|query| + |word|).
+    """
+
+    def __init__(self, words_by_position):
+        positions = {}
+        for position, words in enumerate(words_by_position):
+            for word in words:
+                positions.setdefault(word, set()).add(position)
+
+        self.words = list(positions)
+        self.positions = [tuple(sorted(positions[word])) for word in self.words]
+        self.sizes = []
+        postings = {}
+        for word_id, word in enumerate(self.words):
+            grams = trigrams(word)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(word_id)
+        self.postings = {gram: tuple(word_ids) for gram, word_ids in postings.items()}
+
+    def similar(self, word, threshold):
+        """{word id: similarity} for indexed words at least threshold similar to word"""
+        grams = trigrams(word)
+        shared = {}
+        for gram in grams:
+            for word_id in self.postings.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        matches = {}
+        for word_id, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.sizes[word_id])
+            if similarity >= threshold:
+                matches[word_id] = similarity
+        return matches
+
+    def best_by_position(self, word, threshold):
+        """{item position: similarity of its closest word} for one query word"""
+        best = {}
+        for word_id, similarity in self.similar(word, threshold).items():
+            for position in self.positions[word_id]:
+                if similarity > best.get(position, 0):
+                    best[position] = similarity
+        return best
+
+
+def lower_shared(lowered, text):
+    """text.lower(), the same string object for every occurrence of text"""
+    value = lowered.get(text)
+    if value is None:
+        value = lowered[text] = text.lower()
+    return value
+
+
+class CatalogSearchIndex:
+    """Inverted index over a single catalog.
+
+    Tokens are the lowercased, whitespace separated words of the searchable
+    fields, so a query word matches an item exactly when it is a substring of
+    that item's searchable text (the behaviour the search box relies on).
+    """
+
+    def __init__(self, items, fields, conditions, match_condition_words=False, filter_by_category=True):
+        self.items = items
+        self.conditions = conditions
+        self.match_condition_words = match_condition_words
+        self.filter_by_category = filter_by_category
+
+        token_postings = {}
+        condition_postings = {}
+        category_postings = {}
+
+        # Lowercased text kept per item for the scorer. Each distinct string
+        # is lowercased once and shared by every item using it, and an item's
+        # full searchable text is joined from these parts only when scored.
+        lowered = {}
+        self.lower_fields = []
+        self.lower_conditions = []
+        self.lower_benefits = []
+
+        for position, item in enumerate(items):
+            lower_fields = tuple(lower_shared(lowered, item.get(field) or '') for field in fields)
+            lower_conditions = tuple(lower_shared(lowered, cond) for cond in item.get('conditions', []))
+            lower_benefits = tuple(lower_shared(lowered, benefit) for benefit in item.get('benefits', []))
+            self.lower_fields.append(lower_fields)
+            self.lower_conditions.append(lower_conditions)
+            self.lower_benefits.append(lower_benefits)
+            for token in self.haystack(position).split():
+                token_postings.setdefault(token, set()).add(position)
+
+            for cond in item.get('conditions', []):
+                condition_postings.setdefault(cond.lower(), set()).add(position)
+
+            category_postings.setdefault(item.get('category', '').lower(), set()).add(position)
+
+        self.trigram_index = TrigramIndex(
+            [word for value in [item.get(field) or '' for field in FUZZY_FIELDS] + list(item.get('conditions', []))
+             for word in fuzzy_words(value)]
+            for item in items
+        )
+
+        # Postings are only ever merged into the result of a vocabulary scan,
+        # so tuples do; they take a fraction of a frozenset's memory
+        self.token_postings = {k: tuple(sorted(v)) for k, v in token_postings.items()}
+        self.condition_postings = {k: tuple(sorted(v)) for k, v in condition_postings.items()}
+        # The condition filter tests one bit of each item's condition mask
+        self.condition_masks = [conditions.mask(item.get('conditions', [])) for item in items]
+        self.category_postings = {k: frozenset(v) for k, v in category_postings.items()}
+
+        # Vocabulary scans are done once per distinct word and then remembered
+        self._postings_for_word = functools.lru_cache(maxsize=4096)(self._scan_tokens)
+        self._postings_for_query_condition = functools.lru_cache(maxsize=4096)(self._scan_conditions)
+        self._postings_for_condition_word = functools.lru_cache(maxsize=4096)(self._scan_condition_words)
+        self._fuzzy_matches_for_word = functools.lru_cache(maxsize=4096)(self._scan_fuzzy_word)
+
+    def _scan_tokens(self, word):
+        """Positions of items whose searchable text contains word"""
+        matched = set()
+        for token, posting in self.token_postings.items():
+            if word in token:
+                matched.update(posting)
+        return frozenset(matched)
+
+    def _scan_conditions(self, query):
+        """Positions of items with a condition containing, or contained in, query"""
+        matched = set()
+        for cond, posting in self.condition_postings.items():
+            if query in cond or cond in query:
+                matched.update(posting)
+        return frozenset(matched)
+
+    def _scan_condition_words(self, word):
+        """Positions of items with a condition containing word"""
+        matched = set()
+        for cond, posting in self.condition_postings.items():
+            if word in cond:
+                matched.update(posting)
+        return frozenset(matched)
+
+    def _scan_fuzzy_word(self, word):
+        """{position: similarity} of items with a word close to word (do not modify)"""
+        return self.trigram_index.best_by_position(word, FUZZY_WORD_SIMILARITY)
+
+    def fuzzy_matches(self, query):
+        """{position: similarity} for items whose words approximately match the query's.
+
+        An item's similarity is the mean, over the query words, of the
+        similarity of its closest word.
+        """
+        query_words = fuzzy_words(query)
+        if not query_words:
+            return {}
+        totals = {}
+        for word in query_words:
+            for position, similarity in self._fuzzy_matches_for_word(word).items():
+                totals[position] = totals.get(position, 0) + similarity
+        return {
+            position: total / len(query_words)
+            for position, total in totals.items()
+            if total / len(query_words) >= FUZZY_MIN_SIMILARITY
+        }
+
+    def match(self, query, query_words):
+        """Positions of items matching an already lowercased, stripped query"""
+        # An exact phrase match implies every word matches, so the all-words
+        # intersection covers both checks the search route used to make.
+        matched = None
+        for word in query_words:
+            posting = self._postings_for_word(word)
+            matched = posting if matched is None else matched & posting
+            if not matched:
+                break
+        matched = set(matched or EMPTY_POSTING)
+
+        matched |= self._postings_for_query_condition(query)
+        if self.match_condition_words:
+            for word in query_words:
+                matched |= self._postings_for_condition_word(word)
+        return matched
+
+    def candidates(self, query, query_words, require_all_words=True, category='all', condition_filter='all'):
+        """Positions of items worth scoring for a query, after filters"""
+        if require_all_words:
+            matched = self.match(query, query_words)
+        else:
+            # Anything that can score above zero: one of the words or a condition match
+            matched = set(self._postings_for_query_condition(query))
+            for word in query_words:
+                matched |= self._postings_for_word(word)
+        return self.apply_filters(matched, category, condition_filter)
+
+    def apply_filters(self, matched, category='all', condition_filter='all'):
+        """The positions of a set that pass the category and condition filters"""
+        if matched and self.filter_by_category and category != 'all':
+            matched &= self.category_postings.get(category.lower(), EMPTY_POSTING)
+        if matched and condition_filter != 'all':
+            condition_id = self.conditions.id(condition_filter)
+            if condition_id is None:
+                return set()
+            bit = 1 << condition_id
+            matched = {position for position in matched if self.condition_masks[position] & bit}
+        return matched
+
+    def haystack(self, position):
+        """Lowercased searchable text of one item"""
+        return " ".join(self.lower_fields[position] + self.lower_conditions[position] + self.lower_benefits[position])
+
+    def score(self, position, query, query_words):
+        """Weighted relevance of one item for a query"""
+        haystack = self.haystack(position)
+        score = 0
+
+        # Exact phrase match gets highest score
+        if query in haystack:
+            score += 10
+
+        # Check individual word matches, and whether all of them are present
+        # (for multi-word queries like "back pain")
+        word_hits = sum(1 for word in query_words if position in self._postings_for_word(word))
+        if word_hits == len(query_words):
+            score += 8
+        score += 2 * word_hits
+
+        # Bonus points for condition matches (most important for symptom-based searches)
+        for cond in self.lower_conditions[position]:
+            if query in cond or cond in query:
+                score += 15
+            elif any(word in cond for word in query_words):
+                score += 10
+
+        # Bonus for benefit matches
+        for benefit in self.lower_benefits[position]:
+            if query in benefit:
+                score += 5
+
+        return score
+
+    def rank(self, query, count, require_all_words=True, category='all', condition_filter='all', fuzzy='off'):
+        """Return (total, [(score, item), ...]) for the count best matching items.
+
+        fuzzy='only' ranks approximate matches by similarity instead of the
+        exact matches; fuzzy='blend' adds approximate matches to the exact
+        ones, with the similarity added to each score. Ties keep catalog
+        order. Only the requested number of results is selected from the
+        candidates, with a heap rather than a full sort.
+        """
+        query_words = query.split()
+        if not query_words:
+            return 0, []
+
+        scored = []
+        if fuzzy in ('only', 'blend'):
+            similarities = self.fuzzy_matches(query)
+            fuzzy_positions = self.apply_filters(set(similarities), category, condition_filter)
+        else:
+            similarities, fuzzy_positions = {}, set()
+
+        if fuzzy == 'only':
+            scored = [(FUZZY_SCORE_WEIGHT * similarities[position], -position) for position in fuzzy_positions]
+        else:
+            matched = self.candidates(query, query_words, require_all_words, category, condition_filter)
+            for position in matched | fuzzy_positions:
+                score = self.score(position, query, query_words) if position in matched else 0
+                score += FUZZY_SCORE_WEIGHT * similarities.get(position, 0)
+                if score > 0:
+                    scored.append((score, -position))
+
+        top = heapq.nlargest(count, scored)
+        return len(scored), [(score, self.items[-neg_position]) for score, neg_position in top]
+
+
+# Fields kept in the slim search projection, per catalog
+SLIM_FIELDS = {
+    'yoga': ('id', 'name', 'sanskrit_name', 'category', 'image', 'difficulty', 'conditions'),
+    'remedies': ('id', 'name', 'herb_name', 'category', 'image', 'conditions'),
+    'pranayama': ('id', 'name', 'sanskrit_name', 'image', 'duration', 'conditions'),
+}
+
+
+def slim_projection(catalog, item):
+    """Card-sized view of a catalog item, without instructions or precautions"""
+    projected = {field: item.get(field) for field in SLIM_FIELDS[catalog]}
+    projected['benefits'] = list(item.get('benefits', [])[:2])
+    return projected
+
+
+def encode_search_cursor(offset):
+    """Opaque cursor pointing at the next page of search results"""
+    return base64.urlsafe_b64encode(f"o:{offset}".encode('ascii')).decode('ascii')
+
+
+def decode_search_cursor(cursor):
+    """Offset encoded in a search cursor, or None if the cursor is not valid"""
+    try:
+        prefix, offset = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(':')
+        offset = int(offset)
+    except (ValueError, UnicodeError):
+        return None
+    if prefix != 'o' or offset < 0:
+        return None
+    return offset
+
+
+class SearchIndex:
+    """Search indexes and the shared scoring engine for all three catalogs"""
+
+    def __init__(self, yoga_poses, ayurvedic_remedies, pranayama_exercises, conditions):
+        self.catalogs = {
+            'yoga': CatalogSearchIndex(yoga_poses, SEARCH_FIELDS['yoga'], conditions),
+            'remedies': CatalogSearchIndex(ayurvedic_remedies, SEARCH_FIELDS['remedies'], conditions,
+                                           match_condition_words=True),
+            'pranayama': CatalogSearchIndex(pranayama_exercises, SEARCH_FIELDS['pranayama'], conditions,
+                                            filter_by_category=False),
+        }
+
+    def ranked_search(self, query, limit, offset=0, category='all', condition_filter='all', slim=False,
+                      fuzzy='off'):
+        """Return one page of ranked results per catalog, their totals and whether they are approximate.
+
+        With fuzzy='fallback' a query without any exact match in any catalog
+        is answered with approximate matches (typos, missing letters);
+        fuzzy='blend' always ranks both together. Whether a query matches
+        exactly is decided before the category and condition filters, so a
+        correctly spelled query that the filters empty stays exact.
+        """
+        tops = {}
+        for name, index in self.catalogs.items():
+            tops[name] = index.rank(query, offset + limit, True, category, condition_filter,
+                                    'blend' if fuzzy == 'blend' else 'off')
+        approximate = fuzzy == 'blend'
+        exact = fuzzy != 'fallback' or any(index.match(query, query.split()) for index in self.catalogs.values())
+        if not exact:
+            for name, index in self.catalogs.items():
+                tops[name] = index.rank(query, offset + limit, True, category, condition_filter, 'only')
+            approximate = any(total for total, _ in tops.values())
+
+        results = {}
+        totals = {}
+        for name, (total, top) in tops.items():
+            page = [item for _, item in top[offset:]]
+            if slim:
+                page = [slim_projection(name, item) for item in page]
+            results[name] = page
+            totals[name] = total
+        return results, totals, approximate
+
+
+# Fields offered as suggestions besides conditions, per catalog
+SUGGEST_FIELDS = {
+    'yoga': ('name', 'sanskrit_name'),
+    'remedies': ('name', 'herb_name'),
+    'pranayama': ('name', 'sanskrit_name'),
+}
+SUGGEST_KINDS = ('condition', 'name')
+
+
+class SuggestionIndex:
+    """Prefix lookup over condition names and item names for type-ahead suggestions.
+
+    Conditions are suggested by their canonical spelling. Every term is
+    keyed by its lowercased text and by the text from each
+    later word on, so "pain" also suggests "Back Pain". The keys are kept in
+    one sorted list; a prefix lookup bisects to the first key and walks
+    forward while keys still start with the prefix. Terms carry how many
+    items of each catalog use them, and their total is the popularity
+    weight suggestions are ordered by.
+    """
+
+    def __init__(self, catalogs, conditions):
+        terms = {}
+        for name, items in catalogs.items():
+            for item in items:
+                values = [('condition', conditions.canonical(cond)) for cond in item.get('conditions', [])]
+                values += [('name', item.get(field)) for field in SUGGEST_FIELDS[name] if item.get(field)]
+                for kind, text in set(values):
+                    counts = terms.setdefault((kind, text), {})
+                    counts[name] = counts.get(name, 0) + 1
+
+        self.terms = []
+        keys = []
+        for term_id, ((kind, text), counts) in enumerate(sorted(terms.items())):
+            self.terms.append({'text': text, 'kind': kind, 'weight': sum(counts.values()), 'counts': counts})
+            words = text.lower().split()
+            for start in range(len(words)):
+                keys.append((' '.join(words[start:]), start, term_id))
+        keys.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.key_terms = [(start, term_id) for _, start, term_id in keys]
+        self._lookup = functools.lru_cache(maxsize=4096)(self._scan_prefix)
+
+    def _scan_prefix(self, prefix, kind):
+        """Term ids for a lowercased prefix, best first"""
+        found = {}
+        index = bisect.bisect_left(self.keys, prefix)
+        while index < len(self.keys) and self.keys[index].startswith(prefix):
+            start, term_id = self.key_terms[index]
+            if kind is None or self.terms[term_id]['kind'] == kind:
+                # A term matched from its first word ranks above one matched mid-text
+                found[term_id] = min(start, found.get(term_id, start)) == 0
+            index += 1
+        return tuple(sorted(
+            found,
+            key=lambda term_id: (not found[term_id], -self.terms[term_id]['weight'], self.terms[term_id]['text']),
+        ))
+
+    def suggest(self, prefix, limit=8, kind=None):
+        """The limit best terms starting with prefix (or with one of its words there)"""
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        return [self.terms[term_id] for term_id in self._lookup(prefix, kind)[:limit]]
+
+
+# Catalog Registry
+CATALOG_NAMES = ('yoga', 'remedies', 'pranayama')
+
+
+class CatalogRegistry:
+    """Id-keyed lookup tables for the three catalogs, shared by routes and the model"""
+
+    def __init__(self, yoga_poses, ayurvedic_remedies, pranayama_exercises):
+        self.tables = {}
+        self.scored = {}
+        for name, items in zip(CATALOG_NAMES, (yoga_poses, ayurvedic_remedies, pranayama_exercises)):
+            table = {}
+            scored = {}
+            duplicates = []
+            for item in items:
+                # Records sharing an id collapse onto the first one, which is
+                # the record lookups by id have always resolved to. The id is
+                # scored by the last one, as the original id-keyed scores were
+                if table.setdefault(item['id'], item) is not item:
+                    duplicates.append(str(item['id']))
+                scored[item['id']] = item
+            if duplicates:
+                app.logger.warning("Catalog %s repeats ids, showing the first record and scoring the last: %s",
+                                   name, ', '.join(duplicates))
+            self.tables[name] = table
+            self.scored[name] = scored
+
+    def get(self, catalog, item_id):
+        """Return the item with item_id, or None"""
+        return self.tables[catalog].get(item_id)
+
+    def items(self, catalog):
+        """Unique items of a catalog, in catalog order"""
+        return list(self.tables[catalog].values())
+
+    def scored_items(self, catalog):
+        """The record each item is scored by, aligned with items()"""
+        return list(self.scored[catalog].values())
+
+
+class CatalogAsset:
+    """A catalog serialized to JSON once, with gzip and brotli bodies precomputed
+
+    Only the compressed bodies are kept; the rare client that accepts
+    neither gets the gzip body decompressed on request.
+    """
+
+    def __init__(self, name, items):
+        self.name = name
+        body = json.dumps(items, ensure_ascii=False, separators=(',', ':'), default=dict).encode('utf-8')
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.encodings = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(body, quality=11)
+
+    @property
+    def body(self):
+        return gzip.decompress(self.encodings['gzip'])
+
+    @property
+    def filename(self):
+        return f"{self.name}.{self.digest}.json"
+
+# Binary Catalog Snapshot
+# `python build_catalog.py` compiles the JSON catalogs into one read-only file.
+# Workers map it into memory instead of parsing the JSON, so every worker
+# shares the same pages and no worker keeps its own copy of the records.
+CATALOG_SNAPSHOT_FILE = os.environ.get('CATALOG_SNAPSHOT', 'data/catalog.snapshot')
+
+# Layout, all integers little-endian:
+#   header          magic, format, source version, string and field name counts
+#   catalog table   (record table offset, record count) for each catalog
+#   string offsets  string count + 1 offsets into the string data
+#   string data     every distinct string once, UTF-8: field names first, then
+#                   condition names, so each condition is stored once and
+#                   records refer to it by id, then all other values
+#   list data       string ids of list values
+#   record tables   record count + 1 offsets into the record data
+#   record data     field count, then one fixed size entry per field
+SNAPSHOT_MAGIC = b'AYCS'
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_HEADER = struct.Struct('<4sH12sII')
+SNAPSHOT_CATALOG = struct.Struct('<II')
+SNAPSHOT_FIELD = struct.Struct('<IBII')  # field name id, kind, length, value
+SNAPSHOT_ID = struct.Struct('<I')
+SNAPSHOT_STRING = 0  # value is a string id
+SNAPSHOT_LIST = 1    # value is the offset of length string ids in the list data
+SNAPSHOT_JSON = 2    # value is the string id of any other value, JSON encoded
+
+
+def write_catalog_snapshot(path, catalogs, version):
+    """Write catalogs, a sequence of record lists, as a binary snapshot at path"""
+    strings = {}
+
+    def intern(value):
+        return strings.setdefault(value, len(strings))
+
+    for items in catalogs:
+        for item in items:
+            for key in item:
+                intern(key)
+    field_count = len(strings)
+    for items in catalogs:
+        for item in items:
+            for cond in item.get('conditions', []):
+                intern(cond)
+
+    lists = bytearray()
+    tables = []
+    for items in catalogs:
+        records = []
+        for item in items:
+            record = bytearray([len(item)])
+            for key, value in item.items():
+                if isinstance(value, str):
+                    entry = (SNAPSHOT_STRING, 0, intern(value))
+                elif isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value):
+                    entry = (SNAPSHOT_LIST, len(value), len(lists))
+                    for v in value:
+                        lists += SNAPSHOT_ID.pack(intern(v))
+                else:
+                    entry = (SNAPSHOT_JSON, 0, intern(json.dumps(value, ensure_ascii=False)))
+                record += SNAPSHOT_FIELD.pack(intern(key), *entry)
+            records.append(bytes(record))
+        tables.append(records)
+
+    encoded = [s.encode('utf-8') for s in strings]
+    position = SNAPSHOT_HEADER.size + SNAPSHOT_CATALOG.size * len(catalogs)
+    string_offsets, string_data = [0], bytearray()
+    for s in encoded:
+        string_data += s
+        string_offsets.append(len(string_data))
+    position += SNAPSHOT_ID.size * len(string_offsets) + len(string_data) + len(lists)
+
+    catalog_table, record_sections = bytearray(), bytearray()
+    for records in tables:
+        catalog_table += SNAPSHOT_CATALOG.pack(position + len(record_sections), len(records))
+        offsets, data = [0], bytearray()
+        for record in records:
+            data += record
+            offsets.append(len(data))
+        record_sections += struct.pack(f'<{len(offsets)}I', *offsets) + data
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, version.encode('ascii'),
+                                     len(strings), field_count))
+        f.write(catalog_table)
+        f.write(struct.pack(f'<{len(string_offsets)}I', *string_offsets))
+        f.write(string_data)
+        f.write(lists)
+        f.write(record_sections)
+        f.flush()
+        os.fsync(f.fileno())
+    # Workers still mapping the old file keep its pages until they let go
+    os.replace(tmp_path, path)
+
+
+class CatalogSnapshotFile:
+    """A binary catalog snapshot mapped read-only into memory"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, file_format, version, string_count, field_count = SNAPSHOT_HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC or file_format != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a format {SNAPSHOT_FORMAT} catalog snapshot")
+        self.version = version.rstrip(b'\0').decode('ascii')
+
+        position = SNAPSHOT_HEADER.size
+        self._tables = []
+        for _ in CATALOG_NAMES:
+            self._tables.append(SNAPSHOT_CATALOG.unpack_from(self._map, position))
+            position += SNAPSHOT_CATALOG.size
+        self._string_offsets = position
+        self._string_data = position + SNAPSHOT_ID.size * (string_count + 1)
+        self._list_data = self._string_data + self._offset(self._string_offsets, string_count)
+
+        self.field_ids = {self.string(i): i for i in range(field_count)}
+        self.field_names = {i: name for name, i in self.field_ids.items()}
+
+    def _offset(self, table, index):
+        return SNAPSHOT_ID.unpack_from(self._map, table + SNAPSHOT_ID.size * index)[0]
+
+    def string(self, string_id):
+        start, end = struct.unpack_from('<II', self._map, self._string_offsets + SNAPSHOT_ID.size * string_id)
+        return str(self._map[self._string_data + start:self._string_data + end], 'utf-8')
+
+    def fields(self, position):
+        """(field name id, kind, length, value) entries of the record at position"""
+        count = self._map[position]
+        start = position + 1
+        return SNAPSHOT_FIELD.iter_unpack(self._map[start:start + count * SNAPSHOT_FIELD.size])
+
+    def value(self, kind, length, value):
+        if kind == SNAPSHOT_STRING:
+            return self.string(value)
+        if kind == SNAPSHOT_LIST:
+            start = self._list_data + value
+            return tuple(self.string(i) for i in struct.unpack_from(f'<{length}I', self._map, start))
+        return json.loads(self.string(value))
+
+    def catalogs(self):
+        """The record lists of all catalogs, as views into the mapped file"""
+        catalogs = []
+        for table, count in self._tables:
+            data = table + SNAPSHOT_ID.size * (count + 1)
+            catalogs.append([MappedRecord(self, data + self._offset(table, i)) for i in range(count)])
+        return catalogs
+
+
+class MappedRecord(Mapping):
+    """Read-only catalog item decoded on access from a mapped snapshot.
+
+    Behaves like CatalogRecord (list fields are tuples) while holding no
+    copy of the data, so the record itself costs the worker a few bytes.
+    """
+
+    __slots__ = ('_snapshot', '_position')
+
+    def __init__(self, snapshot, position):
+        self._snapshot = snapshot
+        self._position = position
+
+    def __getitem__(self, key):
+        field_id = self._snapshot.field_ids.get(key)
+        if field_id is not None:
+            for entry_field, kind, length, value in self._snapshot.fields(self._position):
+                if entry_field == field_id:
+                    return self._snapshot.value(kind, length, value)
+        raise KeyError(key)
+
+    def __iter__(self):
+        names = self._snapshot.field_names
+        for field_id, _, _, _ in self._snapshot.fields(self._position):
+            yield names[field_id]
+
+    def __len__(self):
+        return self._snapshot._map[self._position]
+
+    def __repr__(self):
+        return f"MappedRecord({dict(self)!r})"
+
+    def __reduce__(self):
+        return (CatalogRecord, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def open_catalog_snapshot(path, version):
+    """The snapshot at path if it was built from catalog files at version, else None"""
+    try:
+        snapshot = CatalogSnapshotFile(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        app.logger.warning("Ignoring unreadable catalog snapshot %s: %s", path, e)
+        return None
+    if snapshot.version != version:
+        app.logger.warning("Catalog snapshot %s is out of date; run build_catalog.py", path)
+        return None
+    return snapshot
+
+# User Management Functions
+USERS_FILE = 'data/users.json'
+USER_RECOMMENDATIONS_FILE = 'data/user_recommendations.json'
+USER_RECOMMENDATIONS_JOURNAL = 'data/user_recommendations.jsonl'
+SQLITE_DATABASE = os.environ.get('SQLITE_DATABASE', 'data/ayushastra.db')
+
+
+def read_json_file(path):
+    """Load a JSON document, or {} if it is missing or unreadable"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+    return {}
+
+
+def lock_file(f):
+    """Take an exclusive advisory lock on an open file, where the OS supports it"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+class RecommendationJournal:
+    """Append-only, line-delimited log of saved recommendation plans.
+
+    Each line is {"username": ..., "plan": {...}}. Saving a plan appends one
+    line and fsyncs it. A per-user index of byte offsets, ordered by saved_at,
+    lets one user's plans be read, or paged through newest first, without
+    parsing anyone else's or sorting anything. Lines appended by other
+    workers are picked up by indexing only the new tail of the file. Every
+    COMPACT_EVERY appends the log is rewritten grouped by user, which also
+    drops torn lines left by a crash.
+
+    Rewrites, i.e. the legacy import and compaction, hold the journal's lock
+    file so that only one worker rewrites at a time. Each writes its own
+    temporary file and renames it over the journal while holding the
+    journal's own lock, which keeps appends out until the rename is done.
+    """
+
+    COMPACT_EVERY = 1000
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.Lock()
+        self._offsets = {}  # username -> [(saved_at, offset, length), ...] sorted by saved_at
+        self._indexed_size = 0
+        self._inode = None
+        self._appends_since_compaction = 0
+
+    def _line(self, username, plan):
+        return (json.dumps({'username': username, 'plan': plan}) + '\n').encode('utf-8')
+
+    @contextmanager
+    def _rewrite_lock(self):
+        """Serialize rewrites of the journal across threads and worker processes"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', 'a') as lock:
+            lock_file(lock)
+            yield
+
+    def _refresh_index(self):
+        """Bring the offset index up to date with the file (call with _lock held)"""
+        if not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path):
+            # One-time import of the old single-document JSON file, unless
+            # another worker got there first
+            with self._rewrite_lock():
+                if not os.path.exists(self.path):
+                    self._replace(read_json_file(self.legacy_path))
+        if not os.path.exists(self.path):
+            self._offsets, self._indexed_size, self._inode = {}, 0, None
+            return
+
+        stat = os.stat(self.path)
+        if stat.st_ino != self._inode or stat.st_size < self._indexed_size:
+            # The file was compacted or replaced since we last indexed it
+            self._offsets, self._indexed_size, self._inode = {}, 0, stat.st_ino
+        if stat.st_size == self._indexed_size:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._indexed_size)
+            offset = self._indexed_size
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # another worker is still writing this line
+                try:
+                    record = json.loads(line)
+                    username = record['username']
+                    saved_at = str(record['plan'].get('saved_at') or '')
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    username = None  # torn line from a crash, skipped until compaction
+                if username is not None:
+                    # Appends arrive in time order, so this lands at the end
+                    bisect.insort(self._offsets.setdefault(username, []), (saved_at, offset, len(line)))
+                offset += len(line)
+        self._indexed_size = offset
+
+    def _open_current(self, mode):
+        """Open the live file and lock it, retrying if it is replaced meanwhile"""
+        while True:
+            f = open(self.path, mode)
+            lock_file(f)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def append(self, username, plan):
+        """Durably append one saved plan"""
+        line = self._line(username, plan)
+        with self._lock:
+            self._refresh_index()
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with self._open_current('ab') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._appends_since_compaction += 1
+            if self._appends_since_compaction >= self.COMPACT_EVERY:
+                self._compact()
+
+    def _read_entries(self, username, select):
+        """Load the plans for select(index entries of username)"""
+        with self._lock:
+            while True:
+                self._refresh_index()
+                entries = select(self._offsets.get(username, []))
+                if not entries:
+                    return []
+                with open(self.path, 'rb') as f:
+                    if os.fstat(f.fileno()).st_ino != self._inode:
+                        continue  # compacted by another worker since indexing
+                    plans = []
+                    for _, offset, length in entries:
+                        f.seek(offset)
+                        plans.append(json.loads(f.read(length))['plan'])
+                    return plans
+
+    def read(self, username):
+        """Saved plans of one user, oldest first"""
+        return self._read_entries(username, list)
+
+    def read_page(self, username, limit, offset=0, before=None):
+        """Return (plans, has_more) for one page of a user's plans, newest first.
+
+        Only plans saved before the `before` timestamp are considered, and
+        the newest `offset` of those are skipped.
+        """
+        has_more = []
+
+        def select(entries):
+            end = len(entries) if before is None else bisect.bisect_left(entries, (before,))
+            end = max(0, end - offset)
+            start = max(0, end - limit)
+            has_more.append(start > 0)
+            return entries[start:end][::-1]
+
+        plans = self._read_entries(username, select)
+        return plans, bool(has_more and has_more[-1])
+
+    def read_all(self):
+        """Saved plans of every user, oldest first"""
+        with self._lock:
+            self._refresh_index()
+            return self._read_all()
+
+    def _read_all(self):
+        data = {}
+        if not os.path.exists(self.path):
+            return data
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    data.setdefault(record['username'], []).append(record['plan'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return data
+
+    def rewrite(self, data):
+        """Replace the whole journal with data ({username: [plan, ...]})"""
+        with self._lock, self._rewrite_lock():
+            if os.path.exists(self.path):
+                with self._open_current('ab'):
+                    self._replace(data)
+            else:
+                self._replace(data)
+            self._refresh_index()
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        with self._rewrite_lock():
+            with self._open_current('ab'):
+                # Holding the live file's lock keeps other workers from
+                # appending to it while its contents are copied
+                self._replace(self._read_all())
+            self._refresh_index()
+
+    def _replace(self, data):
+        """Write data to a temporary file of our own and rename it over the journal"""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.', suffix='.tmp', dir=directory)
+        try:
+            # mkstemp creates the file private; keep the journal's permissions
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, tmp_path)
+            with os.fdopen(fd, 'wb') as f:
+                for username, plans in data.items():
+                    for plan in plans:
+                        f.write(self._line(username, plan))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self._appends_since_compaction = 0
+        self._offsets, self._indexed_size, self._inode = {}, 0, None
+
+
+def normalize_username(username):
+    """Username as compared for uniqueness (case and surrounding spaces ignored)"""
+    return (username or '').strip().casefold()
+
+def normalize_email(email):
+    """Email address as compared for uniqueness"""
+    return (email or '').strip().lower()
+
+
+class JSONUserRepository:
+    """users.json kept in memory with secondary indexes on normalized username and email.
+
+    The file is parsed again only when its stat signature changes, e.g. after
+    another worker wrote it. Writes go through a lock file and an atomic
+    rename, and refresh the indexes in the same step.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._users = {}
+        self._by_username = {}  # normalized username -> set of usernames
+        self._by_email = {}  # normalized email -> username
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _refresh(self):
+        """Reload the users file if it changed (call with _lock held)"""
+        signature = self._stat_signature()
+        if signature != self._signature or signature is None:
+            self._set(read_json_file(self.path), signature)
+
+    def _set(self, users, signature):
+        by_username = {}
+        by_email = {}
+        for username, user in users.items():
+            by_username.setdefault(normalize_username(username), set()).add(username)
+            by_email.setdefault(normalize_email(user.get('email')), username)
+        self._users, self._by_username, self._by_email = users, by_username, by_email
+        self._signature = signature
+
+    def _write(self, users):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(users, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._set(users, self._stat_signature())
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers across threads and worker processes"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path + '.lock', 'a') as lock:
+                lock_file(lock)
+                self._refresh()
+                yield
+
+    def all(self):
+        with self._lock:
+            self._refresh()
+            return dict(self._users)
+
+    def replace_all(self, users):
+        with self._write_lock():
+            self._write(dict(users))
+
+    def get(self, username):
+        with self._lock:
+            self._refresh()
+            return self._users.get(username)
+
+    def username_taken(self, username):
+        with self._lock:
+            self._refresh()
+            return normalize_username(username) in self._by_username
+
+    def find_by_email(self, email):
+        with self._lock:
+            self._refresh()
+            username = self._by_email.get(normalize_email(email))
+            return self._users.get(username) if username is not None else None
+
+    def add(self, user):
+        """Add user, returning False if the username or email is taken"""
+        with self._write_lock():
+            if (normalize_username(user['username']) in self._by_username
+                    or normalize_email(user['email']) in self._by_email):
+                return False
+            users = dict(self._users)
+            users[user['username']] = user
+            self._write(users)
+            return True
+
+
+class JSONStorage:
+    """Users in data/users.json, saved recommendations in an append-only journal.
+
+    An existing data/user_recommendations.json is imported into the journal
+    the first time it is opened.
+    """
+
+    def __init__(self, users_file=USERS_FILE, recommendations_file=USER_RECOMMENDATIONS_FILE,
+                 journal_file=USER_RECOMMENDATIONS_JOURNAL):
+        self.users_file = users_file
+        self.users = JSONUserRepository(users_file)
+        self.journal = RecommendationJournal(journal_file, legacy_path=recommendations_file)
+
+    def initialize(self):
+        """Create an empty users file if there is none yet"""
+        if not os.path.exists(self.users_file):
+            self.save_users({})
+
+    def load_users(self):
+        return self.users.all()
+
+    def save_users(self, users):
+        self.users.replace_all(users)
+
+    def get_user(self, username):
+        return self.users.get(username)
+
+    def username_taken(self, username):
+        return self.users.username_taken(username)
+
+    def find_user_by_email(self, email):
+        return self.users.find_by_email(email)
+
+    def email_registered(self, email):
+        return self.find_user_by_email(email) is not None
+
+    def add_user(self, user):
+        """Add user, returning False if the username or email is taken"""
+        return self.users.add(user)
+
+    def load_user_recommendations(self):
+        return self.journal.read_all()
+
+    def save_user_recommendations(self, data):
+        self.journal.rewrite(data)
+
+    def get_user_recommendations(self, username):
+        return self.journal.read(username)
+
+    def get_user_recommendations_page(self, username, limit, offset=0, before=None):
+        return self.journal.read_page(username, limit, offset, before)
+
+    def add_user_recommendation(self, username, plan):
+        self.journal.append(username, plan)
+
+
+class SQLiteStorage:
+    """Users and saved recommendations in SQLite (WAL mode), one row per record.
+
+    Logins and saves touch single rows instead of rewriting whole files, and
+    writers in separate gunicorn workers are serialized by SQLite's locking.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            password TEXT NOT NULL,
+            created_at TEXT,
+            data TEXT NOT NULL,
+            username_norm TEXT,
+            email_norm TEXT
+        );
+        CREATE INDEX IF NOT EXISTS users_email ON users (email);
+        CREATE TABLE IF NOT EXISTS user_recommendations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            saved_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS user_recommendations_username
+            ON user_recommendations (username, saved_at);
+    """
+
+    NORMALIZED_INDEXES = """
+        CREATE INDEX IF NOT EXISTS users_username_norm ON users (username_norm);
+        CREATE INDEX IF NOT EXISTS users_email_norm ON users (email_norm);
+    """
+
+    def __init__(self, path=SQLITE_DATABASE):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        """Per-thread connection, created on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(self.SCHEMA)
+            self._add_normalized_columns(conn)
+            conn.executescript(self.NORMALIZED_INDEXES)
+            self._local.conn = conn
+        return conn
+
+    def _add_normalized_columns(self, conn):
+        """Upgrade databases created before the normalized lookup columns existed"""
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(users)')}
+        if 'email_norm' in columns:
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(users)')}
+        if 'email_norm' not in columns:
+            conn.execute('ALTER TABLE users ADD COLUMN username_norm TEXT')
+            conn.execute('ALTER TABLE users ADD COLUMN email_norm TEXT')
+            for username, email in conn.execute('SELECT username, email FROM users').fetchall():
+                conn.execute('UPDATE users SET username_norm = ?, email_norm = ? WHERE username = ?',
+                             (normalize_username(username), normalize_email(email), username))
+        conn.execute('COMMIT')
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database write lock up front"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def initialize(self):
+        self._connect()
+
+    def load_users(self):
+        rows = self._connect().execute('SELECT username, data FROM users')
+        return {username: json.loads(data) for username, data in rows}
+
+    def save_users(self, users):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM users')
+            for user in users.values():
+                self._insert_user(conn, user)
+
+    def _insert_user(self, conn, user):
+        conn.execute(
+            'INSERT OR REPLACE INTO users (username, email, password, created_at, data, username_norm, email_norm)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (user['username'], user.get('email', ''), user.get('password', ''),
+             user.get('created_at'), json.dumps(user),
+             normalize_username(user['username']), normalize_email(user.get('email'))))
+
+    def get_user(self, username):
+        row = self._connect().execute('SELECT data FROM users WHERE username = ?', (username,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def username_taken(self, username):
+        row = self._connect().execute('SELECT 1 FROM users WHERE username_norm = ? LIMIT 1',
+                                      (normalize_username(username),)).fetchone()
+        return row is not None
+
+    def find_user_by_email(self, email):
+        row = self._connect().execute('SELECT data FROM users WHERE email_norm = ? LIMIT 1',
+                                      (normalize_email(email),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def email_registered(self, email):
+        return self.find_user_by_email(email) is not None
+
+    def add_user(self, user):
+        """Add user, returning False if the username or email is taken"""
+        with self._transaction() as conn:
+            taken = conn.execute('SELECT 1 FROM users WHERE username_norm = ? OR email_norm = ? LIMIT 1',
+                                 (normalize_username(user['username']), normalize_email(user['email']))).fetchone()
+            if taken:
+                return False
+            self._insert_user(conn, user)
+        return True
+
+    def load_user_recommendations(self):
+        data = {}
+        rows = self._connect().execute('SELECT username, data FROM user_recommendations ORDER BY id')
+        for username, plan in rows:
+            data.setdefault(username, []).append(json.loads(plan))
+        return data
+
+    def save_user_recommendations(self, data):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM user_recommendations')
+            for username, plans in data.items():
+                for plan in plans:
+                    self._insert_recommendation(conn, username, plan)
+
+    def _insert_recommendation(self, conn, username, plan):
+        conn.execute('INSERT INTO user_recommendations (username, saved_at, data) VALUES (?, ?, ?)',
+                     (username, plan.get('saved_at'), json.dumps(plan)))
+
+    def get_user_recommendations(self, username):
+        rows = self._connect().execute(
+            'SELECT data FROM user_recommendations WHERE username = ? ORDER BY id', (username,))
+        return [json.loads(plan) for plan, in rows]
+
+    def get_user_recommendations_page(self, username, limit, offset=0, before=None):
+        """Return (plans, has_more) for one page of a user's plans, newest first"""
+        query = 'SELECT data FROM user_recommendations WHERE username = ?'
+        params = [username]
+        if before is not None:
+            query += ' AND saved_at < ?'
+            params.append(before)
+        query += ' ORDER BY saved_at DESC, id DESC LIMIT ? OFFSET ?'
+        params += [limit + 1, offset]
+        plans = [json.loads(plan) for plan, in self._connect().execute(query, params)]
+        return plans[:limit], len(plans) > limit
+
+    def add_user_recommendation(self, username, plan):
+        with self._transaction() as conn:
+            self._insert_recommendation(conn, username, plan)
+
+
+STORAGE_BACKENDS = {
+    'json': JSONStorage,
+    'sqlite': SQLiteStorage,
+}
+
+class InstrumentedStorage:
+    """Storage backend wrapper that times every method call into storage_seconds"""
+
+    def __init__(self, backend):
+        self.backend = backend
 
-def get_local_pose_matches(query, limit=6):
-    """Return basic pose matches using improved keyword search."""
-    query_lower = query.lower().strip()
-    if not query_lower:
-        return []
-    
-    query_words = query_lower.split()
-    scored = []
-    
-    for pose in yoga_poses:
-        # Build comprehensive searchable text
-        haystack = " ".join([
-            pose.get('name', ''),
-            pose.get('sanskrit_name', ''),
-            pose.get('category', ''),
-            pose.get('subcategory', ''),
-            " ".join(pose.get('conditions', [])),
-            " ".join(pose.get('benefits', []))
-        ]).lower()
-        
-        score = 0
-        
-        # Exact phrase match gets highest score
-        if query_lower in haystack:
-            score += 10
-        
-        # Check if all query words are present (for multi-word queries like "back pain")
-        if all(word in haystack for word in query_words):
-            score += 8
-        
-        # Check individual word matches
-        for word in query_words:
-            if word in haystack:
-                score += 2
-        
-        # Bonus points for condition matches (most important for symptom-based searches)
-        for cond in pose.get('conditions', []):
-            cond_lower = cond.lower()
-            if query_lower in cond_lower or cond_lower in query_lower:
-                score += 15  # High priority for condition matches
-            elif any(word in cond_lower for word in query_words):
-                score += 10
-        
-        # Bonus for benefit matches
-        for benefit in pose.get('benefits', []):
-            if query_lower in benefit.lower():
-                score += 5
-        
-        if score > 0:
-            scored.append((score, pose))
-    
-    # Sort by score (highest first)
-    scored.sort(key=lambda item: item[0], reverse=True)
-    
-    # Return top matches
-    results = []
-    for _, pose in scored[:limit]:
-        results.append({
-            'id': pose['id'],
-            'name': pose['name'],
-            'sanskrit_name': pose['sanskrit_name'],
-            'category': pose['category'],
-            'image': pose.get('image'),
-            'benefits': pose['benefits'][:2],
-            'difficulty': pose['difficulty'],
-            'conditions': pose['conditions']
-        })
-    
-    return results
+    def __getattr__(self, name):
+        attr = getattr(self.backend, name)
+        if not callable(attr):
+            return attr
 
-# Load data
-def load_data():
-    with open('data/yoga_poses.json', 'r', encoding='utf-8') as f:
-        yoga_poses = json.load(f)
-    
-    with open('data/ayurvedic_remedies.json', 'r', encoding='utf-8') as f:
-        ayurvedic_remedies = json.load(f)
-    
-    with open('data/pranayama_exercises.json', 'r', encoding='utf-8') as f:
-        pranayama_exercises = json.load(f)
-    
-    return yoga_poses, ayurvedic_remedies, pranayama_exercises
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            with storage_seconds.time(name):
+                return attr(*args, **kwargs)
 
-# Load data on startup
-# Trigger reload for data update
-yoga_poses, ayurvedic_remedies, pranayama_exercises = load_data()
+        # Later lookups of the same method skip __getattr__
+        self.__dict__[name] = timed
+        return timed
 
-# User Management Functions
-USERS_FILE = 'data/users.json'
-USER_RECOMMENDATIONS_FILE = 'data/user_recommendations.json'
+
+# Pick the backend with STORAGE_BACKEND=json|sqlite (JSON files by default)
+storage = InstrumentedStorage(STORAGE_BACKENDS[os.environ.get('STORAGE_BACKEND', 'json').lower()]())
 
 def load_users():
-    """Load users from JSON file"""
-    if os.path.exists(USERS_FILE):
-        try:
-            with open(USERS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    """Load all users from the storage backend"""
+    return storage.load_users()
 
 def save_users(users):
-    """Save users to JSON file"""
-    os.makedirs('data', exist_ok=True)
-    with open(USERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(users, f, indent=2)
+    """Replace all users in the storage backend"""
+    storage.save_users(users)
 
 def load_user_recommendations():
-    """Load user recommendations from JSON file"""
-    if os.path.exists(USER_RECOMMENDATIONS_FILE):
-        try:
-            with open(USER_RECOMMENDATIONS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    """Load every user's saved recommendations from the storage backend"""
+    return storage.load_user_recommendations()
 
 def save_user_recommendations(data):
-    """Save user recommendations to JSON file"""
-    os.makedirs('data', exist_ok=True)
-    with open(USER_RECOMMENDATIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+    """Replace every user's saved recommendations in the storage backend"""
+    storage.save_user_recommendations(data)
+
+# Password hashing (pbkdf2/scrypt) is CPU heavy. It runs on a small bounded
+# pool so a burst of logins cannot occupy every request thread; hashlib
+# releases the GIL while hashing, so the rest of the site keeps serving.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '16'))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '10'))
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool is at its admission limit"""
+
+
+class PasswordHasher:
+    """Bounded worker pool for password hashing with admission control.
+
+    At most max_pending hashes may be queued or running at once; further
+    requests are refused immediately with PasswordHasherBusy.
+
+    The calling request thread still waits for its hash. The pool caps how
+    many hashes run at once and turns excess sign-ins into fast 503s, but
+    only threaded or gevent workers (gunicorn --threads N or -k gevent)
+    keep serving other requests meanwhile; a sync worker is tied up for
+    the whole hash.
+    """
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+        future = self._executor.submit(fn, *args)
+        # The slot is freed when the hash finishes, even if the caller gave up waiting
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            raise PasswordHasherBusy()
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def stats(self):
+        """Queue depth and throughput counters"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'peak_pending': self._peak_pending,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_TIMEOUT)
 
 def create_user(username, email, password):
-    """Create a new user"""
-    users = load_users()
-    if username in users:
+    """Create a new user (raises PasswordHasherBusy when hashing is saturated)"""
+    if storage.username_taken(username):
         return False, "Username already exists"
-    if any(user.get('email') == email for user in users.values()):
+    if storage.email_registered(email):
         return False, "Email already registered"
     
-    users[username] = {
+    user = {
         'username': username,
         'email': email,
-        'password': generate_password_hash(password),
+        'password': password_hasher.hash(password),
         'created_at': datetime.now().isoformat()
     }
-    save_users(users)
+    if not storage.add_user(user):
+        # Someone else took the username or email in the meantime
+        return False, "Username or email already registered"
     return True, "User created successfully"
 
 def verify_user(username, password):
-    """Verify user credentials"""
-    users = load_users()
-    if username not in users:
+    """Verify user credentials (raises PasswordHasherBusy when hashing is saturated)"""
+    user = storage.get_user(username)
+    if user is None:
         return False, "Invalid username or password"
     
-    user = users[username]
-    if check_password_hash(user['password'], password):
+    if password_hasher.check(user['password'], password):
         return True, user
     return False, "Invalid username or password"
 
@@ -179,17 +1812,76 @@ def verify_user(username, password):
 def home():
     return render_template('index.html')
 
+class PageCache:
+    """Rendered HTML of read-only pages, keyed by page, catalog version and login state.
+
+    Entries made for an older catalog version are dropped as soon as a
+    newer version is requested. At most max_entries pages are kept, least
+    recently used first out.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, version, render):
+        """Return (body, etag) for key, rendering it on a miss"""
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        body = render().encode('utf-8')
+        entry = (body, hashlib.sha1(body).hexdigest())
+        with self._lock:
+            self.misses += 1
+            if version == self._version:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+
+page_cache = PageCache()
+
+def cached_page(template, **context):
+    """Render a read-only page through the page cache, answering 304 when possible"""
+    # Flash messages are shown once, so a page carrying them is never cached
+    if '_flashes' in session:
+        return render_template(template, **context)
+    
+    # The navigation bar shows the signed-in user's name
+    username = session.get('username') if session.get('logged_in') else None
+    key = (request.endpoint, username)
+    version = current_catalog().version
+    body, etag = page_cache.get_or_render(key, version, lambda: render_template(template, **context))
+    
+    response = app.response_class(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache' if username else 'no-cache'
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
 @app.route('/yoga')
 def yoga_tab():
-    return render_template('yoga.html', yoga_poses=yoga_poses)
+    return cached_page('yoga.html', yoga_poses=current_catalog().yoga_poses)
 
 @app.route('/ayurvedic')
 def ayurvedic_tab():
-    return render_template('ayurvedic.html', ayurvedic_remedies=ayurvedic_remedies)
+    return cached_page('ayurvedic.html', ayurvedic_remedies=current_catalog().ayurvedic_remedies)
 
 @app.route('/pranayama')
 def pranayama_tab():
-    return render_template('pranayama.html', pranayama_exercises=pranayama_exercises)
+    return cached_page('pranayama.html', pranayama_exercises=current_catalog().pranayama_exercises)
 
 @app.route('/recommendations')
 def recommendations_tab():
@@ -218,7 +1910,11 @@ def login():
                 flash('Please fill in all fields', 'error')
                 return render_template('login.html')
             
-            success, result = verify_user(username, password)
+            try:
+                success, result = verify_user(username, password)
+            except PasswordHasherBusy:
+                flash('We are handling a lot of sign-ins right now. Please try again in a moment.', 'error')
+                return render_template('login.html'), 503
             if success:
                 session['username'] = username
                 session['logged_in'] = True
@@ -246,7 +1942,11 @@ def login():
                 flash('Password must be at least 6 characters long', 'error')
                 return render_template('login.html')
             
-            success, message = create_user(username, email, password)
+            try:
+                success, message = create_user(username, email, password)
+            except PasswordHasherBusy:
+                flash('We are handling a lot of sign-ups right now. Please try again in a moment.', 'error')
+                return render_template('login.html'), 503
             if success:
                 session['username'] = username
                 session['logged_in'] = True
@@ -264,292 +1964,967 @@ def logout():
     flash('You have been logged out successfully', 'info')
     return redirect(url_for('home'))
 
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+
 @app.route('/api/search')
 def search():
     query = request.args.get('q', '').lower().strip()
     category = request.args.get('category', 'all')
     condition_filter = request.args.get('condition', 'all')
+    limit = request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    slim = request.args.get('view', 'full') == 'slim'
+    # Approximate matching: off, fallback (only when nothing matches exactly) or blend
+    fuzzy = request.args.get('fuzzy', SEARCH_FUZZY_DEFAULT)
+    if fuzzy not in SEARCH_FUZZY_MODES:
+        return jsonify({'error': f"fuzzy must be one of {', '.join(SEARCH_FUZZY_MODES)}"}), 400
     
-    results = {
-        'yoga': [],
-        'remedies': [],
-        'pranayama': []
-    }
+    # A cursor from a previous page takes precedence over offset
+    cursor = request.args.get('cursor')
+    if cursor:
+        offset = decode_search_cursor(cursor)
+        if offset is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
     
     if not query:
-        return jsonify(results)
-    
-    # Search yoga poses with improved matching
-    for pose in yoga_poses:
-        # Build searchable text from all relevant fields
-        searchable_text = " ".join([
-            pose['name'],
-            pose['sanskrit_name'],
-            pose.get('category', ''),
-            pose.get('subcategory', ''),
-            " ".join(pose.get('conditions', [])),
-            " ".join(pose.get('benefits', []))
-        ]).lower()
-        
-        # Check if query matches in any field
-        # Also check if individual words match (for "back pain" -> matches "Back Pain")
-        query_words = query.split()
-        matches = False
-        
-        # Exact phrase match
-        if query in searchable_text:
-            matches = True
-        # Individual word matching (for multi-word queries)
-        elif all(word in searchable_text for word in query_words):
-            matches = True
-        # Check if query matches any condition directly
-        elif any(query in cond.lower() or cond.lower() in query for cond in pose.get('conditions', [])):
-            matches = True
-        
-        if matches:
-            # Apply category filter
-            if category == 'all' or pose.get('category', '').lower() == category.lower():
-                # Apply condition filter
-                if condition_filter == 'all' or condition_filter in pose.get('conditions', []):
-                    results['yoga'].append(pose)
-    
-    # Search remedies with improved matching
-    for remedy in ayurvedic_remedies:
-        # Build comprehensive searchable text
-        searchable_text = " ".join([
-            remedy.get('name', ''),
-            remedy.get('herb_name', ''),
-            remedy.get('category', ''),
-            remedy.get('description', ''),
-            " ".join(remedy.get('conditions', [])),
-            " ".join(remedy.get('benefits', []))
-        ]).lower()
-        
-        query_words = query.split()
-        matches = False
-        
-        # Exact phrase match
-        if query in searchable_text:
-            matches = True
-        # Individual word matching (for multi-word queries)
-        elif all(word in searchable_text for word in query_words):
-            matches = True
-        # Check if query matches any condition directly (highest priority for symptom-based searches)
-        elif any(query in cond.lower() or cond.lower() in query or 
-                any(word in cond.lower() for word in query_words) 
-                for cond in remedy.get('conditions', [])):
-            matches = True
-        # Check if query matches any benefit
-        elif any(query in benefit.lower() for benefit in remedy.get('benefits', [])):
-            matches = True
-        
-        if matches:
-            # Apply category filter
-            if category == 'all' or remedy.get('category', '').lower() == category.lower():
-                # Apply condition filter
-                if condition_filter == 'all' or condition_filter in remedy.get('conditions', []):
-                    results['remedies'].append(remedy)
-    
-    # Search pranayama
-    for exercise in pranayama_exercises:
-        searchable_text = " ".join([
-            exercise.get('name', ''),
-            exercise.get('sanskrit_name', ''),
-            " ".join(exercise.get('conditions', [])),
-            " ".join(exercise.get('benefits', []))
-        ]).lower()
-        
-        query_words = query.split()
-        matches = (query in searchable_text or 
-                  all(word in searchable_text for word in query_words) or
-                  any(query in cond.lower() or cond.lower() in query for cond in exercise.get('conditions', [])))
-        
-        if matches:
-            if condition_filter == 'all' or condition_filter in exercise.get('conditions', []):
-                results['pranayama'].append(exercise)
+        return jsonify({'yoga': [], 'remedies': [], 'pranayama': [],
+                        'total': {'yoga': 0, 'remedies': 0, 'pranayama': 0},
+                        'next_cursor': None, 'approximate': False})
+    
+    # Matching and the category/condition filters are answered from the
+    # prebuilt index, then each catalog is ranked by the shared scorer
+    results, totals, approximate = current_catalog().search_index.ranked_search(
+        query, limit, offset, category, condition_filter, slim, fuzzy)
+    
+    has_more = any(total > offset + limit for total in totals.values())
+    results['total'] = totals
+    results['next_cursor'] = encode_search_cursor(offset + limit) if has_more else None
+    results['approximate'] = approximate
     
     return jsonify(results)
 
+@app.route('/api/suggest')
+def suggest():
+    """Type-ahead suggestions: condition and item names starting with q.
+
+    Each suggestion is {"text", "kind", "weight", "counts"}, where counts
+    holds the number of items per catalog that use the term. Pass
+    kind=condition or kind=name to get only one kind.
+    """
+    query = request.args.get('q', '')
+    kind = request.args.get('kind')
+    if kind is not None and kind not in SUGGEST_KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(SUGGEST_KINDS)}"}), 400
+    limit = request.args.get('limit', SUGGEST_DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+    
+    catalog = current_catalog()
+    response = jsonify({'suggestions': catalog.suggestions.suggest(query, limit, kind)})
+    # Suggestions only change with the catalog, so browsers may reuse them briefly
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    response.set_etag(f"{catalog.version}-{hashlib.sha1(response.get_data()).hexdigest()[:16]}")
+    return response.make_conditional(request)
+
+
+@app.template_global()
+def catalog_url(name):
+    """Versioned URL of a catalog's JSON, safe to cache forever"""
+    return url_for('catalog_json', filename=current_catalog().assets[name].filename)
+
+@app.route('/api/catalog/<filename>')
+def catalog_json(filename):
+    name, _, rest = filename.partition('.')
+    asset = current_catalog().assets.get(name)
+    if asset is None or not rest.endswith('.json'):
+        return jsonify({'error': 'Not found'}), 404
+    if filename != asset.filename:
+        # Stale version from an old page; point at the current one
+        return redirect(catalog_url(name))
+    
+    # Serve the smallest precompressed body the client accepts
+    body, encoding = asset.body, None
+    for candidate in ('br', 'gzip'):
+        if candidate in asset.encodings and request.accept_encodings[candidate]:
+            body, encoding = asset.encodings[candidate], candidate
+            break
+    
+    response = app.response_class(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{asset.digest}-{encoding or 'identity'}")
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response.make_conditional(request)
+
+# Static Assets
+# Every file under static/ is also served from /assets/<hash>/<path>. The hash
+# follows the file's content, so those URLs can be cached forever. Run
+# build_assets.py to precompute the hashes, WebP thumbnails for the catalog
+# cards and gzip copies of text assets; without it hashes are computed on
+# first use.
+STATIC_MANIFEST_FILE = os.path.join(app.static_folder, 'assets-manifest.json')
+STATIC_PREFIX = '/static/'
+PRECOMPRESSED_TYPES = ('.svg', '.css', '.js', '.json', '.txt')
+
+# Let a fronting nginx/Apache send the file bodies (X-Sendfile). Otherwise
+# the WSGI server's file wrapper sends them, with sendfile() under gunicorn.
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
+
+
+def file_digest(path):
+    """Short content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
 
 
+class StaticAssets:
+    """Content hashes of static files, from the build manifest or computed on first use.
+
+    Entries are checked against the file's mtime and size, so an edited
+    file gets a new hash without rebuilding the manifest.
+    """
+
+    def __init__(self, root, manifest_path):
+        self.root = root
+        self.manifest_path = manifest_path
+        self._manifest_signature = None
+        self._files = {}
+        self._thumbnails = {}
+        self._computed = {}
+        self._lock = threading.Lock()
+
+    def _refresh_manifest(self):
+        try:
+            stat = os.stat(self.manifest_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._manifest_signature:
+            return
+        manifest = read_json_file(self.manifest_path) or {}
+        with self._lock:
+            self._files = manifest.get('files', {})
+            self._thumbnails = manifest.get('thumbnails', {})
+            self._manifest_signature = signature
+
+    def path(self, filename):
+        """Absolute path of a static file, or None if it is missing or outside static/"""
+        path = safe_join(self.root, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        return path
+
+    def entry(self, filename):
+        """Manifest-style entry {'hash', 'size', 'mtime_ns', 'gzip'} for a static file, or None"""
+        self._refresh_manifest()
+        path = self.path(filename)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        for entries in (self._files, self._computed):
+            entry = entries.get(filename)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                return entry
+
+        entry = {'hash': file_digest(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'gzip': False}
+        with self._lock:
+            self._computed[filename] = entry
+        return entry
+
+    def thumbnail(self, filename):
+        """Static path of the built thumbnail for an image, or None"""
+        self._refresh_manifest()
+        thumbnail = self._thumbnails.get(filename)
+        if thumbnail and self.path(thumbnail):
+            return thumbnail
+        return None
+
+
+static_assets = StaticAssets(app.static_folder, STATIC_MANIFEST_FILE)
+
+def static_filename(path):
+    """A path relative to static/, from either that or a /static/... URL"""
+    if path.startswith(STATIC_PREFIX):
+        return path[len(STATIC_PREFIX):]
+    return path.lstrip('/')
+
+@app.template_global()
+def asset_url(path):
+    """Content-hashed URL of a static file, safe to cache forever"""
+    filename = static_filename(path)
+    entry = static_assets.entry(filename)
+    if entry is None:
+        return url_for('static', filename=filename)
+    return url_for('hashed_asset', digest=entry['hash'], filename=filename)
+
+@app.template_global()
+def thumbnail_url(path):
+    """URL of the catalog card thumbnail for an image, or of the image itself"""
+    filename = static_filename(path)
+    return asset_url(static_assets.thumbnail(filename) or filename)
+
+@app.route('/assets/<digest>/<path:filename>')
+def hashed_asset(digest, filename):
+    entry = static_assets.entry(filename)
+    if entry is None:
+        return jsonify({'error': 'Not found'}), 404
+    if digest != entry['hash']:
+        # Stale hash from an old page; point at the current file
+        return redirect(asset_url(filename))
+    
+    path = static_assets.path(filename)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    if entry.get('gzip') and request.accept_encodings['gzip'] and os.path.isfile(path + '.gz'):
+        path, encoding = path + '.gz', 'gzip'
+    
+    # conditional=True answers Range requests with 206 and matching ETags with 304
+    response = send_file(path, mimetype=mimetype, conditional=True,
+                         etag=f"{entry['hash']}-{encoding or 'identity'}", max_age=31536000)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if entry.get('gzip'):
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+def catalog_item_response(catalog, item_id):
+    """JSON response for a single catalog item, or a 404"""
+    item = current_catalog().registry.get(catalog, item_id)
+    if item is None:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(item)
+
+@app.route('/api/yoga/<pose_id>')
+def yoga_pose_detail(pose_id):
+    return catalog_item_response('yoga', pose_id)
+
+@app.route('/api/remedies/<remedy_id>')
+def remedy_detail(remedy_id):
+    return catalog_item_response('remedies', remedy_id)
+
+@app.route('/api/pranayama/<exercise_id>')
+def pranayama_detail(exercise_id):
+    return catalog_item_response('pranayama', exercise_id)
+
 
 # ML Model Simulation for Personalized Recommendations
+def parse_duration(duration_str):
+    """Parse duration string to minutes (e.g., '5-10 minutes' -> 10)"""
+    try:
+        # Extract numbers from duration string
+        numbers = re.findall(r'\d+', duration_str)
+        if numbers:
+            # Return the maximum value found (e.g., '5-10' -> 10)
+            return int(max(numbers, key=int))
+        return 15  # Default if parsing fails
+    except:
+        return 15  # Default if parsing fails
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores in each row of a profiles x items matrix,
+    best first, ties in catalog order"""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    # Scores are whole numbers, so this key is unique per item and ranks
+    # exactly like a stable sort on score
+    keys = scores * n - np.arange(n)
+    if len(keys) == 1:
+        # A single profile is cheaper on the plain 1-D path
+        best = np.argpartition(-keys[0], k - 1)[:k]
+        return best[np.argsort(-keys[0, best])][np.newaxis]
+    rows = np.arange(len(keys))[:, np.newaxis]
+    best = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+    return best[rows, np.argsort(-keys[rows, best], axis=1)]
+
+
+class CatalogMatrix:
+    """Catalog compiled at load time into arrays for vectorized scoring"""
+
+    def __init__(self, items, conditions, difficulty_codes, scored_items=None):
+        """items are the records returned; scored_items, if given, are the records whose fields are scored"""
+        self.items = items
+        self.scored_items = items if scored_items is None else scored_items
+        # The rows of the items listing each condition, stored like a sparse
+        # column index: condition c's rows are
+        # condition_items[condition_starts[c]:condition_starts[c + 1]]
+        rows_by_condition = [[] for _ in range(len(conditions))]
+        for row, item in enumerate(self.scored_items):
+            for condition_id in mask_bits(conditions.mask(item.get('conditions', []))):
+                rows_by_condition[condition_id].append(row)
+        self.condition_starts = np.cumsum([0] + [len(rows) for rows in rows_by_condition], dtype=np.intp)
+        self.condition_items = np.array([row for rows in rows_by_condition for row in rows], dtype=np.intp)
+        self.difficulty = np.array(
+            [difficulty_codes.get(item.get('difficulty'), -1) for item in self.scored_items], dtype=np.int16)
+        self.duration = np.array(
+            [parse_duration(item.get('duration', '10 minutes')) for item in self.scored_items], dtype=np.float64)
+        self._body_part_mask = functools.lru_cache(maxsize=256)(self._scan_body_part)
+
+    def _scan_body_part(self, part):
+        """1.0 for items whose conditions mention part, else 0.0"""
+        return np.array([part in ' '.join(item.get('conditions', [])).lower() for item in self.scored_items],
+                        dtype=np.float64)
+
+    def symptom_matches(self, symptom_pairs, profile_count):
+        """Number of each profile's distinct symptoms among each item's conditions (profiles x items).
+
+        symptom_pairs holds a profile row array and a condition id array, one
+        entry per symptom. Each pair contributes a one to the cells of the
+        items listing its condition, so a cell ends up at
+        popcount(symptoms & conditions).
+        """
+        profile_rows, condition_ids = symptom_pairs
+        if profile_count == 1:
+            # A single request has a handful of symptoms; adding their
+            # posting slices directly beats setting up the batch gather
+            counts = np.zeros((1, len(self.items)), dtype=np.float64)
+            for condition_id in condition_ids.tolist():
+                counts[0, self.condition_items[self.condition_starts[condition_id]:self.condition_starts[condition_id + 1]]] += 1
+            return counts
+        starts = self.condition_starts[condition_ids]
+        lengths = self.condition_starts[condition_ids + 1] - starts
+        # Item rows of all pairs gathered at once: pair i's run of lengths[i]
+        # entries starts at starts[i]
+        run_starts = np.cumsum(lengths) - lengths
+        positions = np.arange(int(lengths.sum())) + np.repeat(starts - run_starts, lengths)
+        cells = np.repeat(profile_rows * len(self.items), lengths) + self.condition_items[positions]
+        counts = np.bincount(cells, minlength=profile_count * len(self.items))
+        return counts.reshape(profile_count, len(self.items)).astype(np.float64)
+
+    def body_part_matches(self, body_parts_per_profile):
+        """Number of each profile's body parts mentioned by each item's conditions (profiles x items)"""
+        matches = np.zeros((len(body_parts_per_profile), len(self.items)), dtype=np.float64)
+        for row, body_parts in enumerate(body_parts_per_profile):
+            for part in body_parts:
+                matches[row] += self._body_part_mask(part.lower())
+        return matches
+
+    def top_items(self, scores, k, scale):
+        """The k best items of each row of scores, as ScoredItems with confidence scores/scale"""
+        best = top_k(scores, k)
+        return [
+            [ScoredItem(self.items[column], min(score / scale, 1.0)) for column, score in zip(columns, row_scores)]
+            for columns, row_scores in zip(best.tolist(), scores[np.arange(len(scores))[:, np.newaxis], best].tolist())
+        ]
+
+
+MANTRA_NAMES = {
+    'om': 'Om Mantra - Universal Healing',
+    'gayatri': 'Gayatri Mantra - Wisdom & Knowledge',
+    'mrityunjaya': 'Maha Mrityunjaya - Healing & Protection',
+    'shanti': 'Shanti Mantra - Peace & Tranquility'
+}
+
+
+def mantra_recommendation(mantra_id, confidence_score):
+    """Recommendation entry for a mantra"""
+    return {
+        'id': mantra_id,
+        'name': MANTRA_NAMES.get(mantra_id, 'Unknown Mantra'),
+        'confidence_score': confidence_score,
+        'benefits': ['Spiritual healing', 'Mental clarity', 'Emotional balance'],
+        'duration': '10-20 minutes',
+        'frequency': 'Daily practice recommended'
+    }
+
+
+RECOMMENDATION_SECTIONS = ('yoga', 'remedies', 'pranayama', 'mantras')
+
+# Conditions each mantra is recommended for
+MANTRA_CONDITIONS = {
+    'om': ('Stress', 'Anxiety', 'Insomnia'),
+    'gayatri': ('Poor Concentration', 'Memory Issues'),
+    'mrityunjaya': ('Fatigue', 'Weakness'),
+    'shanti': ('Anxiety', 'Stress', 'Anger'),
+}
+
+
 class WellnessRecommendationModel:
-    def __init__(self):
+    def __init__(self, registry, conditions):
         self.accuracy = 94.2  # Simulated accuracy
         self.training_data_size = 10000  # Simulated training data
         
-    def predict_recommendations(self, user_profile):
-        """Simulate ML model prediction with confidence scores"""
-        symptoms = user_profile.get('symptoms', [])
-        body_parts = user_profile.get('body_parts', [])
-        experience = user_profile.get('experience', 'Beginner')
-        time_available = int(user_profile.get('time_available', '15'))
-        
-        # Simulate ML model scoring
-        recommendations = {
-            'yoga': [],
-            'remedies': [],
-            'pranayama': [],
-            'mantras': [],
-            'model_metrics': {
-                'accuracy': self.accuracy,
-                'confidence_score': random.uniform(0.85, 0.98),
-                'training_samples': self.training_data_size,
-                'prediction_time': random.uniform(0.1, 0.5)
-            }
-        }
+        # Score one row per catalog id, so every winner is a registry record
+        yoga_poses = registry.items('yoga')
+        ayurvedic_remedies = registry.items('remedies')
+        pranayama_exercises = registry.items('pranayama')
         
-        # Enhanced recommendation logic with ML-like scoring
-        yoga_scores = {}
-        remedy_scores = {}
-        pranayama_scores = {}
-        mantra_scores = {}
+        # Shared condition vocabulary: one matrix column per canonical condition
+        self.conditions = conditions
+        self.mantra_masks = {mantra_id: conditions.mask(conds) for mantra_id, conds in MANTRA_CONDITIONS.items()}
         
-        # Score yoga poses based on user profile
+        self.difficulty_codes = {}
         for pose in yoga_poses:
-            score = 0
-            for symptom in symptoms:
-                if symptom in pose['conditions']:
-                    score += 10
-            for part in body_parts:
-                if part.lower() in ' '.join(pose['conditions']).lower():
-                    score += 8
-            if experience == pose['difficulty']:
-                score += 5
-            
-            # Filter by time available - prefer poses that fit within time constraint
-            pose_duration = self._parse_duration(pose.get('duration', '10 minutes'))
-            if pose_duration <= time_available:
-                score += 3  # Bonus for poses that fit time constraint
-            elif pose_duration > time_available * 1.5:
-                score -= 5  # Penalty for poses that take too long
-            
-            yoga_scores[pose['id']] = score
+            self.difficulty_codes.setdefault(pose.get('difficulty'), len(self.difficulty_codes))
         
-        # Score remedies
-        for remedy in ayurvedic_remedies:
-            score = 0
-            for symptom in symptoms:
-                if symptom in remedy['conditions']:
-                    score += 12
-            remedy_scores[remedy['id']] = score
+        self.yoga = CatalogMatrix(yoga_poses, conditions, self.difficulty_codes, registry.scored_items('yoga'))
+        self.remedies = CatalogMatrix(ayurvedic_remedies, conditions, self.difficulty_codes,
+                                      registry.scored_items('remedies'))
+        self.pranayama = CatalogMatrix(pranayama_exercises, conditions, self.difficulty_codes,
+                                       registry.scored_items('pranayama'))
+    
+    def _symptom_pairs(self, symptom_masks):
+        """(profile rows, condition ids) arrays with one entry per symptom of each profile"""
+        rows, condition_ids = [], []
+        for row, mask in enumerate(symptom_masks):
+            for condition_id in mask_bits(mask):
+                rows.append(row)
+                condition_ids.append(condition_id)
+        return np.array(rows, dtype=np.intp), np.array(condition_ids, dtype=np.intp)
         
-        # Score pranayama exercises
-        for exercise in pranayama_exercises:
-            score = 0
-            for symptom in symptoms:
-                if symptom in exercise['conditions']:
-                    score += 9
-            
-            # Filter by time available
-            exercise_duration = self._parse_duration(exercise.get('duration', '10 minutes'))
-            if exercise_duration <= time_available:
-                score += 2  # Bonus for exercises that fit time constraint
-            
-            pranayama_scores[exercise['id']] = score
+    def _features(self, user_profiles):
+        """Profile fields the section scorers need, parsed once for a batch of profiles"""
+        symptom_masks = [self.conditions.mask(profile.get('symptoms', [])) for profile in user_profiles]
+        return {
+            'symptom_masks': symptom_masks,
+            'symptom_pairs': self._symptom_pairs(symptom_masks),
+            'body_parts': [profile.get('body_parts', []) for profile in user_profiles],
+            'experience_codes': np.array(
+                [self.difficulty_codes.get(profile.get('experience', 'Beginner'), -2) for profile in user_profiles],
+                dtype=np.int16),
+            'time_available': np.array(
+                [int(profile.get('time_available', '15')) for profile in user_profiles], dtype=np.float64),
+        }
+    
+    def _symptom_matches(self, catalog_matrix, features):
+        return catalog_matrix.symptom_matches(features['symptom_pairs'], len(features['symptom_masks']))
+    
+    # Each section scorer takes the features of a batch of profiles and
+    # returns one list of recommendations per profile
+    def score_yoga(self, features):
+        # Score yoga poses based on user profile
+        time_available = features['time_available'][:, np.newaxis]
+        yoga_scores = 10 * self._symptom_matches(self.yoga, features)
+        yoga_scores += 8 * self.yoga.body_part_matches(features['body_parts'])
+        yoga_scores += 5 * (self.yoga.difficulty == features['experience_codes'][:, np.newaxis])
         
-        # Score mantras based on symptoms
-        mantra_data = [
-            {'id': 'om', 'conditions': ['Stress', 'Anxiety', 'Insomnia'], 'score': 0},
-            {'id': 'gayatri', 'conditions': ['Poor Concentration', 'Memory Issues'], 'score': 0},
-            {'id': 'mrityunjaya', 'conditions': ['Fatigue', 'Weakness'], 'score': 0},
-            {'id': 'shanti', 'conditions': ['Anxiety', 'Stress', 'Anger'], 'score': 0}
-        ]
+        # Filter by time available - prefer poses that fit within time constraint,
+        # penalize poses that take too long
+        yoga_scores += np.where(self.yoga.duration <= time_available, 3,
+                                np.where(self.yoga.duration > time_available * 1.5, -5, 0))
         
-        for mantra in mantra_data:
-            score = 0
-            for symptom in symptoms:
-                if symptom in mantra['conditions']:
-                    score += 7
-            mantra_scores[mantra['id']] = score
+        return self.yoga.top_items(yoga_scores, 3, 20)  # Normalize to 0-1
+    
+    def score_remedies(self, features):
+        remedy_scores = 12 * self._symptom_matches(self.remedies, features)
+        return self.remedies.top_items(remedy_scores, 3, 24)
+    
+    def score_pranayama(self, features):
+        # Score pranayama exercises, with a bonus for exercises that fit the time available
+        pranayama_scores = 9 * self._symptom_matches(self.pranayama, features)
+        pranayama_scores += 2 * (self.pranayama.duration <= features['time_available'][:, np.newaxis])
+        return self.pranayama.top_items(pranayama_scores, 3, 18)
+    
+    def score_mantras(self, features):
+        return [self._mantras_for(mask) for mask in features['symptom_masks']]
+    
+    def _mantras_for(self, symptom_mask):
+        # Score mantras based on the symptoms they are recommended for
+        mantra_scores = {
+            mantra_id: 7 * (symptom_mask & mantra_mask).bit_count()
+            for mantra_id, mantra_mask in self.mantra_masks.items()
+        }
         
-        # Get top recommendations
-        top_yoga = sorted(yoga_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-        top_remedies = sorted(remedy_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-        top_pranayama = sorted(pranayama_scores.items(), key=lambda x: x[1], reverse=True)[:3]
         top_mantras = sorted(mantra_scores.items(), key=lambda x: x[1], reverse=True)[:2]
         
-        # Add recommendations with confidence scores
-        for pose_id, score in top_yoga:
-            pose = next(p for p in yoga_poses if p['id'] == pose_id)
-            pose['confidence_score'] = min(score / 20, 1.0)  # Normalize to 0-1
-            recommendations['yoga'].append(pose)
-        
-        for remedy_id, score in top_remedies:
-            remedy = next(r for r in ayurvedic_remedies if r['id'] == remedy_id)
-            remedy['confidence_score'] = min(score / 24, 1.0)
-            recommendations['remedies'].append(remedy)
-        
-        for exercise_id, score in top_pranayama:
-            exercise = next(e for e in pranayama_exercises if e['id'] == exercise_id)
-            exercise['confidence_score'] = min(score / 18, 1.0)
-            recommendations['pranayama'].append(exercise)
-        
-        # Add mantra recommendations
-        mantra_names = {
-            'om': 'Om Mantra - Universal Healing',
-            'gayatri': 'Gayatri Mantra - Wisdom & Knowledge',
-            'mrityunjaya': 'Maha Mrityunjaya - Healing & Protection',
-            'shanti': 'Shanti Mantra - Peace & Tranquility'
+        # Only include mantras with a match
+        return [mantra_recommendation(mantra_id, min(score / 14, 1.0))
+                for mantra_id, score in top_mantras if score > 0]
+    
+    def model_metrics(self, prediction_time):
+        """Metrics reported with a prediction; prediction_time is the measured time in seconds"""
+        return {
+            'accuracy': self.accuracy,
+            'confidence_score': random.uniform(0.85, 0.98),
+            'training_samples': self.training_data_size,
+            'prediction_time': prediction_time
         }
+    
+    def _features_timed(self, user_profiles):
+        with model_stage_seconds.time('features'):
+            return self._features(user_profiles)
+    
+    def _score_section(self, section, features):
+        with model_stage_seconds.time(section):
+            return getattr(self, f'score_{section}')(features)
+    
+    def iter_sections(self, user_profile, executor=None):
+        """Yield (section, items) for each recommendation section as soon as it is scored.
+
+        With an executor the four section scorers run concurrently and
+        sections come out in the order they finish; without one they are
+        scored in turn, in RECOMMENDATION_SECTIONS order.
+        """
+        features = self._features_timed([user_profile])
+        if executor is None:
+            for section in RECOMMENDATION_SECTIONS:
+                yield section, self._score_section(section, features)[0]
+            return
         
-        for mantra_id, score in top_mantras:
-            if score > 0:  # Only include if there's a match
-                mantra_rec = {
-                    'id': mantra_id,
-                    'name': mantra_names.get(mantra_id, 'Unknown Mantra'),
-                    'confidence_score': min(score / 14, 1.0),
-                    'benefits': ['Spiritual healing', 'Mental clarity', 'Emotional balance'],
-                    'duration': '10-20 minutes',
-                    'frequency': 'Daily practice recommended'
-                }
-                recommendations['mantras'].append(mantra_rec)
-        
+        futures = {executor.submit(self._score_section, section, features): section
+                   for section in RECOMMENDATION_SECTIONS}
+        for future in as_completed(futures):
+            yield futures[future], future.result()[0]
+    
+    def predict_recommendations(self, user_profile):
+        """Simulate ML model prediction with confidence scores"""
+        started = time.perf_counter()
+        recommendations = dict(self.iter_sections(user_profile))
+        elapsed = time.perf_counter() - started
+        prediction_seconds.observe((), elapsed)
+        recommendations['model_metrics'] = self.model_metrics(elapsed)
         return recommendations
     
-    def _parse_duration(self, duration_str):
-        """Parse duration string to minutes (e.g., '5-10 minutes' -> 10)"""
-        try:
-            # Extract numbers from duration string
-            numbers = re.findall(r'\d+', duration_str)
-            if numbers:
-                # Return the maximum value found (e.g., '5-10' -> 10)
-                return int(max(numbers, key=int))
-            return 15  # Default if parsing fails
-        except:
-            return 15  # Default if parsing fails
+    def predict_batch(self, user_profiles, chunk_size=500):
+        """predict_recommendations for many profiles, scoring each section as one matrix product.
+
+        Profiles are scored chunk_size at a time, which keeps the profile
+        matrices small enough to stay in cache.
+        """
+        results = []
+        for start in range(0, len(user_profiles), chunk_size):
+            started = time.perf_counter()
+            features = self._features_timed(user_profiles[start:start + chunk_size])
+            sections = [self._score_section(section, features) for section in RECOMMENDATION_SECTIONS]
+            # Each profile is credited with its share of the chunk's time
+            elapsed = (time.perf_counter() - started) / len(features['symptom_masks'])
+            for row_sections in zip(*sections):
+                recommendations = dict(zip(RECOMMENDATION_SECTIONS, row_sections))
+                recommendations['model_metrics'] = self.model_metrics(elapsed)
+                results.append(recommendations)
+        return results
+    
+# Catalog Snapshots
+# Everything derived from the data files lives in one immutable snapshot.
+# The catalog manager replaces the whole snapshot when the files change.
+CATALOG_WATCH_INTERVAL = float(os.environ.get('CATALOG_WATCH_INTERVAL', '5'))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+# With LAZY_STARTUP=1 the catalogs load on the first request instead of at
+# import. Leave it off under gunicorn --preload, so workers fork with the
+# catalogs already in memory.
+LAZY_STARTUP = os.environ.get('LAZY_STARTUP', '0') == '1'
+
+
+class CatalogSnapshot:
+    """One version of the catalogs with their indexes, assets and model"""
+
+    def __init__(self, yoga_poses, ayurvedic_remedies, pranayama_exercises, version):
+        self.yoga_poses = yoga_poses
+        self.ayurvedic_remedies = ayurvedic_remedies
+        self.pranayama_exercises = pranayama_exercises
+        self.version = version
+        self.conditions = ConditionVocabulary(
+            [item.get('conditions', []) for item in [*yoga_poses, *ayurvedic_remedies, *pranayama_exercises]]
+            + list(MANTRA_CONDITIONS.values())
+        )
+        with startup_stage('build search index'):
+            self.search_index = SearchIndex(yoga_poses, ayurvedic_remedies, pranayama_exercises, self.conditions)
+            self.suggestions = SuggestionIndex(dict(zip(CATALOG_NAMES, (yoga_poses, ayurvedic_remedies,
+                                                                         pranayama_exercises))),
+                                               self.conditions)
+        self.registry = CatalogRegistry(yoga_poses, ayurvedic_remedies, pranayama_exercises)
+        with startup_stage('build catalog assets'):
+            self.assets = {
+                name: CatalogAsset(name, items)
+                for name, items in zip(CATALOG_NAMES, (yoga_poses, ayurvedic_remedies, pranayama_exercises))
+            }
+        with startup_stage('build recommendation model'):
+            self.model = WellnessRecommendationModel(self.registry, self.conditions)
+
+
+class CatalogManager:
+    """Holds the current catalog snapshot and rebuilds it when the data files change.
+
+    Requests check the files' mtimes at most once per watch_interval, and a
+    change starts a rebuild on a background thread. The new snapshot is
+    swapped in with a single assignment, so requests already holding the
+    old one keep a consistent view. A file that fails to load, e.g. one
+    that is still being written or is not a list of records, leaves the
+    current snapshot in place and is retried on the next check.
+    """
+
+    def __init__(self, files, watch_interval):
+        self.files = files
+        self.watch_interval = watch_interval
+        self.snapshot = None
+        self.reloads = 0
+        self.last_error = None
+        self._signature = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+
+    def _stat_signature(self):
+        signature = []
+        for path in self.files:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def reload(self, force=False):
+        """Rebuild the snapshot if the files changed (always with force); True if swapped"""
+        with self._reload_lock:
+            signature = self._stat_signature()
+            if not force and signature == self._signature:
+                return False
+            try:
+                with startup_stage('load catalog data'):
+                    data = load_data()
+                snapshot = CatalogSnapshot(*data)
+            except Exception as e:
+                # Any failure, including a file of the wrong shape, keeps the
+                # catalog in service; only the first load has nothing to keep
+                if self.snapshot is None:
+                    raise
+                self.last_error = f'{type(e).__name__}: {e}'
+                app.logger.warning("Catalog reload failed, keeping version %s: %s", self.snapshot.version,
+                                   self.last_error)
+                return False
+            self._signature = signature
+            self.snapshot = snapshot
+            self.reloads += 1
+            self.last_error = None
+            return True
+
+    def current(self):
+        """The current snapshot, loading the catalogs on first use"""
+        if self.snapshot is None:
+            self.reload()
+        return self.snapshot
+
+    def reload_in_background(self, force=False):
+        threading.Thread(target=self.reload, args=(force,), name='catalog-reload', daemon=True).start()
+
+    def check_for_changes(self):
+        """Start a background rebuild if the data files changed since the last one"""
+        if self.watch_interval <= 0 or self.snapshot is None:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.watch_interval:
+            return
+        self._last_check = now
+        if self._stat_signature() != self._signature and not self._reload_lock.locked():
+            self.reload_in_background()
+
+
+# Rebuilding the binary snapshot also swaps in a snapshot that maps it
+catalog_manager = CatalogManager((*CATALOG_FILES, CATALOG_SNAPSHOT_FILE), CATALOG_WATCH_INTERVAL)
+if not LAZY_STARTUP:
+    catalog_manager.reload(force=True)
+
+def current_catalog():
+    """The catalog snapshot for this request, fixed for the whole request"""
+    if not has_app_context():
+        return catalog_manager.current()
+    if 'catalog' not in g:
+        g.catalog = catalog_manager.current()
+    return g.catalog
+
+@app.before_request
+def watch_catalog_files():
+    catalog_manager.check_for_changes()
+
+@app.route('/api/admin/reload-catalog', methods=['POST'])
+def reload_catalog():
+    """Rebuild the catalog snapshot in the background (requires ADMIN_TOKEN)"""
+    token = request.headers.get('X-Admin-Token', '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        return jsonify({'success': False, 'message': 'Forbidden'}), 403
     
-# Initialize ML model
-ml_model = WellnessRecommendationModel()
+    catalog_manager.reload_in_background(force=True)
+    return jsonify({'success': True, 'current_version': current_catalog().version}), 202
+
+class RecommendationCache:
+    """Recently computed recommendation sections, keyed by catalog version and profile.
+
+    Scoring is deterministic for a catalog version and profile, so repeated
+    profiles are answered from memory. Entries for an older catalog version
+    are dropped as soon as a newer version is requested. At most
+    max_entries profiles are kept, least recently used first out, and none
+    for longer than ttl seconds. model_metrics is not cached, since it is
+    drawn afresh for every prediction.
+    """
+
+    def __init__(self, max_entries=4096, ttl=600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def profile_key(catalog, user_profile):
+        """Canonical form of the profile fields the model scores on.
+
+        Symptoms are scored as a set of canonical conditions, so they key by
+        their condition mask. Body parts are order-insensitive but repeats
+        count, so they become a sorted tuple; they are matched
+        case-insensitively. Time is kept to the minute, since any coarser
+        bucket would change which poses fit.
+        """
+        return (
+            catalog.conditions.mask(user_profile.get('symptoms', [])),
+            tuple(sorted(part.lower() for part in user_profile.get('body_parts', []))),
+            user_profile.get('experience', 'Beginner'),
+            int(user_profile.get('time_available', '15')),
+        )
+
+    def _lookup(self, key, version):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def _store(self, key, version, sections):
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, sections)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def predict(self, catalog, user_profile):
+        """catalog.model.predict_recommendations(user_profile), from the cache when possible"""
+        started = time.perf_counter()
+        key = self.profile_key(catalog, user_profile)
+        sections = self._lookup(key, catalog.version)
+        if sections is None:
+            recommendations = catalog.model.predict_recommendations(user_profile)
+            sections = {section: recommendations[section] for section in RECOMMENDATION_SECTIONS}
+            self._store(key, catalog.version, sections)
+        elapsed = time.perf_counter() - started
+        return {**sections, 'model_metrics': catalog.model.model_metrics(elapsed)}
+
+    def get(self, catalog, user_profile):
+        """Cached sections for a profile, or None"""
+        return self._lookup(self.profile_key(catalog, user_profile), catalog.version)
+
+    def put(self, catalog, user_profile, sections):
+        self._store(self.profile_key(catalog, user_profile), catalog.version, sections)
+
+    def stats(self):
+        """Size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+recommendation_cache = RecommendationCache(
+    int(os.environ.get('RECOMMENDATION_CACHE_SIZE', '4096')),
+    float(os.environ.get('RECOMMENDATION_CACHE_TTL', '600')),
+)
+
+def recommendation_profile(data):
+    """User profile for the recommendation model from a request body"""
+    return {
+        'symptoms': data.get('symptoms', []),
+        'body_parts': data.get('body_parts', []),
+        'conditions': data.get('conditions', []),
+        'experience': data.get('experience', 'Beginner'),
+        'time_available': data.get('time_available', '15'),
+        'timestamp': datetime.now().isoformat()
+    }
+
+PROFILE_LIST_FIELDS = ('symptoms', 'body_parts', 'conditions')
+
+def profile_error(profile):
+    """Why a posted profile cannot be scored, or None if it can"""
+    if not isinstance(profile, dict):
+        return 'profile must be an object'
+    for field in PROFILE_LIST_FIELDS:
+        values = profile.get(field, [])
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            return f'{field} must be a list of strings'
+    if not isinstance(profile.get('experience', 'Beginner'), str):
+        return 'experience must be a string'
+    try:
+        int(profile.get('time_available', '15'))
+    except (TypeError, ValueError):
+        return 'time_available must be a whole number of minutes'
+    return None
 
 @app.route('/api/recommendations', methods=['POST'])
 def get_recommendations():
     data = request.json
-    symptoms = data.get('symptoms', [])
-    body_parts = data.get('body_parts', [])
-    conditions = data.get('conditions', [])
-    experience = data.get('experience', 'Beginner')
-    time_available = data.get('time_available', '15')
-    
-    # Debug log
-    print(f"Received recommendation request - Experience: {experience}, Time: {time_available} minutes")
+    app.logger.debug("Recommendation request - experience: %s, time: %s minutes",
+                     data.get('experience', 'Beginner'), data.get('time_available', '15'))
     
     # Create user profile for ML model
-    user_profile = {
-        'symptoms': symptoms,
-        'body_parts': body_parts,
-        'conditions': conditions,
-        'experience': experience,
-        'time_available': time_available,
-        'timestamp': datetime.now().isoformat()
-    }
+    user_profile = recommendation_profile(data)
     
-    # Get ML-powered recommendations
-    recommendations = ml_model.predict_recommendations(user_profile)
+    # Get ML-powered recommendations; repeated profiles come from the cache
+    catalog = current_catalog()
+    recommendations = recommendation_cache.predict(catalog, user_profile)
+    recommendations['catalog_version'] = catalog.version
     
     return jsonify(recommendations)
 
+# Section scorers for the streaming endpoint run on this pool; 0 scores them
+# in turn on the request thread
+RECOMMENDATION_SECTION_WORKERS = int(os.environ.get('RECOMMENDATION_SECTION_WORKERS', '4'))
+recommendation_executor = (
+    ThreadPoolExecutor(max_workers=RECOMMENDATION_SECTION_WORKERS, thread_name_prefix='recommend')
+    if RECOMMENDATION_SECTION_WORKERS > 0 else None
+)
+
+@app.route('/api/recommendations/stream', methods=['POST'])
+def stream_recommendations():
+    """Recommendations as NDJSON, one line per section as soon as it is scored.
+
+    Each line is {"section": name, "items": [...]}; the last one is
+    {"section": "done", "model_metrics": {...}, "catalog_version": ...}.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    
+    user_profile = recommendation_profile(data)
+    catalog = current_catalog()
+    cached = recommendation_cache.get(catalog, user_profile)
+    
+    def generate():
+        started = time.perf_counter()
+        if cached is not None:
+            sections = cached.items()
+        else:
+            sections = catalog.model.iter_sections(user_profile, recommendation_executor)
+        scored = {}
+        for section, items in sections:
+            scored[section] = items
+            yield app.json.dumps({'section': section, 'items': items}) + '\n'
+        elapsed = time.perf_counter() - started
+        if cached is None:
+            prediction_seconds.observe((), elapsed)
+            recommendation_cache.put(catalog, user_profile, scored)
+        yield app.json.dumps({
+            'section': 'done',
+            'model_metrics': catalog.model.model_metrics(elapsed),
+            'catalog_version': catalog.version,
+        }) + '\n'
+    
+    response = app.response_class(generate(), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-store'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Largest number of profiles accepted by one batch request
+RECOMMENDATION_BATCH_MAX = int(os.environ.get('RECOMMENDATION_BATCH_MAX', '5000'))
+
+@app.route('/api/recommendations/batch', methods=['POST'])
+def batch_recommendations():
+    """Recommendations for many profiles in one call, in request order.
+
+    Takes {"profiles": [...]} with the same fields as /api/recommendations
+    and returns {"results": [...], "catalog_version": ...}. A profile that
+    cannot be scored fails the whole request with 400 and its index.
+    """
+    data = request.get_json(silent=True)
+    profiles = data.get('profiles') if isinstance(data, dict) else None
+    if not isinstance(profiles, list):
+        return jsonify({'error': 'Expected {"profiles": [...]} with one object per profile'}), 400
+    if len(profiles) > RECOMMENDATION_BATCH_MAX:
+        return jsonify({'error': f'At most {RECOMMENDATION_BATCH_MAX} profiles per request'}), 413
+    
+    # Every profile is checked before any is scored
+    for index, profile in enumerate(profiles):
+        error = profile_error(profile)
+        if error:
+            return jsonify({'error': f'Invalid profile: {error}', 'index': index}), 400
+    
+    catalog = current_catalog()
+    results = catalog.model.predict_batch(profiles)
+    return jsonify({'results': results, 'catalog_version': catalog.version})
+
+# Saved plans store catalog ids and scores rather than copies of the items,
+# and are expanded from the in-memory catalog when they are displayed
+SAVED_PLAN_SCHEMA = 2
+SAVED_PLAN_SECTIONS = ('yoga', 'remedies', 'pranayama')
+SAVED_PROFILE_FIELDS = ('symptoms', 'body_parts', 'conditions', 'experience', 'time_available')
+MAX_SAVED_ITEMS = 20
+
+def saved_item_refs(entries):
+    """[{'id': ..., 'score': ...}] for posted items, full or already compact.
+
+    Anything but a list of item objects is ignored, as it always was.
+    """
+    if not isinstance(entries, list):
+        return []
+    refs = []
+    for entry in entries[:MAX_SAVED_ITEMS]:
+        if isinstance(entry, Mapping) and entry.get('id') is not None:
+            score = entry.get('score', entry.get('confidence_score'))
+            if not isinstance(score, (int, float)):
+                score = None
+            refs.append({'id': str(entry['id']), 'score': score})
+    return refs
+
+def compact_saved_plan(data):
+    """Reduce a posted plan to the user profile plus catalog ids and scores.
+
+    Accepts the compact payload sent by recommendations.html as well as the
+    older one that carried complete catalog items.
+    """
+    profile = data.get('profile') if isinstance(data.get('profile'), dict) else data
+    items = data.get('items') if isinstance(data.get('items'), dict) else data
+    return {
+        'schema': SAVED_PLAN_SCHEMA,
+        'catalog_version': str(data.get('catalog_version') or current_catalog().version),
+        'profile': {field: profile[field] for field in SAVED_PROFILE_FIELDS if field in profile},
+        'items': {section: saved_item_refs(items.get(section) or []) for section in SAVED_PLAN_SECTIONS},
+        'mantras': saved_item_refs(data.get('mantras') or []),
+    }
+
+def rehydrate_saved_plan(plan):
+    """Expand a saved plan into the shape my_recommendations.html renders"""
+    if plan.get('schema') != SAVED_PLAN_SCHEMA:
+        return plan  # saved before the compact schema, items are stored in full
+    
+    registry = current_catalog().registry
+    view = dict(plan.get('profile', {}))
+    view['saved_at'] = plan.get('saved_at')
+    view['catalog_version'] = plan.get('catalog_version')
+    for section in SAVED_PLAN_SECTIONS:
+        view[section] = []
+        for ref in plan['items'].get(section, []):
+            record = registry.get(section, ref['id'])
+            if record is not None:  # skip items removed from the catalog since
+                view[section].append(ScoredItem(record, ref['score']))
+    view['mantras'] = [mantra_recommendation(ref['id'], ref['score'])
+                       for ref in plan.get('mantras', []) if ref['id'] in MANTRA_NAMES]
+    return view
+
 @app.route('/api/save_recommendations', methods=['POST'])
 def save_recommendations():
     if not session.get('logged_in'):
@@ -558,51 +2933,68 @@ def save_recommendations():
     username = session.get('username')
     data = request.json
     
-    if not data:
+    if not data or not isinstance(data, dict):
         return jsonify({'success': False, 'message': 'No data provided'}), 400
     
-    recommendations_data = load_user_recommendations()
-    
-    if username not in recommendations_data:
-        recommendations_data[username] = []
-    
     # Add timestamp and save
-    data['saved_at'] = datetime.now().isoformat()
-    recommendations_data[username].append(data)
-    
-    save_user_recommendations(recommendations_data)
+    plan = compact_saved_plan(data)
+    plan['saved_at'] = datetime.now().isoformat()
+    storage.add_user_recommendation(username, plan)
     
     return jsonify({'success': True, 'message': 'Recommendations saved successfully'})
 
+MY_RECOMMENDATIONS_PAGE_SIZE = 10
+
+def saved_plans_page(username):
+    """One page of a user's saved plans, newest first, from ?page= or ?before="""
+    limit = request.args.get('limit', MY_RECOMMENDATIONS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, 50))
+    page = max(1, request.args.get('page', 1, type=int))
+    before = request.args.get('before') or None
+    
+    # A before cursor already marks where the page starts
+    offset = 0 if before else (page - 1) * limit
+    plans, has_more = storage.get_user_recommendations_page(username, limit, offset, before)
+    next_before = plans[-1].get('saved_at') if has_more and plans else None
+    return {
+        'plans': plans,
+        'page': page,
+        'limit': limit,
+        'has_more': has_more,
+        'next_before': next_before,
+    }
+
 @app.route('/my-recommendations')
 def my_recommendations():
     if not session.get('logged_in'):
         flash('Please login to view your saved recommendations', 'info')
         return redirect(url_for('login'))
     
-    username = session.get('username')
-    print(f"DEBUG: Logged in user: '{username}'")
-    print(f"DEBUG: Session data: {dict(session)}")
-    
-    all_recommendations = load_user_recommendations()
-    print(f"DEBUG: All recommendation keys: {list(all_recommendations.keys())}")
-    print(f"DEBUG: Looking for username: '{username}'")
-    
-    user_recommendations = all_recommendations.get(username, [])
-    print(f"DEBUG: Found {len(user_recommendations)} recommendations for user '{username}'")
-    
-    # Sort by date (newest first)
-    user_recommendations.sort(key=lambda x: x.get('saved_at', ''), reverse=True)
+    result = saved_plans_page(session.get('username'))
+    recommendations = [rehydrate_saved_plan(plan) for plan in result['plans']]
+    return render_template('my_recommendations.html', recommendations=recommendations,
+                           next_before=result['next_before'],
+                           is_first_page=result['page'] == 1 and not request.args.get('before'))
+
+@app.route('/api/my-recommendations')
+def my_recommendations_api():
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': 'Please login to view saved recommendations'}), 401
     
-    print(f"DEBUG: Passing {len(user_recommendations)} recommendations to template")
-    return render_template('my_recommendations.html', recommendations=user_recommendations)
+    result = saved_plans_page(session.get('username'))
+    result['plans'] = [rehydrate_saved_plan(plan) for plan in result['plans']]
+    return jsonify(result)
 
 @app.route('/api/model-metrics')
 def get_model_metrics():
     """Return ML model performance metrics"""
+    total, count = prediction_seconds.totals().get((), (0.0, 0))
     return jsonify({
-        'accuracy': ml_model.accuracy,
-        'training_samples': ml_model.training_data_size,
+        'accuracy': current_catalog().model.accuracy,
+        'training_samples': current_catalog().model.training_data_size,
+        'average_prediction_time': total / count if count else None,
+        'predictions': count,
+        'result_cache': recommendation_cache.stats(),
         'last_updated': datetime.now().isoformat(),
         'model_version': '1.0.0',
         'features': [
@@ -614,6 +3006,47 @@ def get_model_metrics():
         ]
     })
 
+@app.route('/metrics')
+def metrics():
+    """Latency histograms and cache counters in the Prometheus text format"""
+    lines = []
+    for histogram in (request_seconds, model_stage_seconds, prediction_seconds, storage_seconds):
+        lines += histogram.render()
+    
+    lines += render_samples('ayushastra_page_cache_requests_total', 'counter', 'Page cache lookups',
+                            [(('hit',), page_cache.hits), (('miss',), page_cache.misses)], ('result',))
+    result_cache = recommendation_cache.stats()
+    lines += render_samples('ayushastra_result_cache_requests_total', 'counter', 'Recommendation cache lookups',
+                            [(('hit',), result_cache['hits']), (('miss',), result_cache['misses'])], ('result',))
+    lines += render_samples('ayushastra_result_cache_evictions_total', 'counter',
+                            'Recommendation cache entries evicted', [((), result_cache['evictions'])])
+    lines += render_samples('ayushastra_result_cache_entries', 'gauge', 'Recommendation cache entries',
+                            [((), result_cache['entries'])])
+    
+    catalog = catalog_manager.snapshot
+    if catalog is not None:
+        search_cache = []
+        for name, index in catalog.search_index.catalogs.items():
+            info = index._postings_for_word.cache_info()
+            search_cache += [((name, 'hit'), info.hits), ((name, 'miss'), info.misses)]
+        lines += render_samples('ayushastra_search_vocabulary_cache_requests_total', 'counter',
+                                'Search vocabulary scan cache lookups', search_cache, ('catalog', 'result'))
+    
+    for name, value in password_hasher.stats().items():
+        if name in ('completed', 'rejected'):
+            lines += render_samples(f'ayushastra_password_hashes_{name}_total', 'counter',
+                                    f'Password hashing jobs {name}', [((), value)])
+        else:
+            lines += render_samples(f'ayushastra_password_hasher_{name}', 'gauge',
+                                    f'Password hasher {name.replace("_", " ")}', [((), value)])
+    lines += render_samples('ayushastra_catalog_reloads_total', 'counter', 'Catalog snapshots loaded',
+                            [((), catalog_manager.reloads)])
+    if catalog is not None:
+        lines += render_samples('ayushastra_catalog_info', 'gauge', 'Current catalog version',
+                                [((catalog.version,), 1)], ('version',))
+    
+    return app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
@@ -621,9 +3054,8 @@ if __name__ == '__main__':
     os.makedirs('static/css', exist_ok=True)
     os.makedirs('static/js', exist_ok=True)
     
-    # Initialize users file if it doesn't exist
-    if not os.path.exists(USERS_FILE):
-        save_users({})
+    # Initialize users storage if it doesn't exist
+    storage.initialize()
     
     print("Starting AyushAstra - Your Holistic Wellness Guide")
     print("Server will be available at: http://localhost:5000")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Score many user profiles offline and write the recommendations as JSON lines.
+
+Usage:
+    python batch_recommend.py profiles.jsonl [-o recommendations.jsonl] [--workers 4]
+
+Each input line is a JSON profile with the fields /api/recommendations takes
+(symptoms, body_parts, experience, time_available). Any "username" or "id"
+field is copied to the output. Output lines come in input order, as
+{"line": n, "username": ..., "recommendations": {...}}. With --plans,
+"recommendations" is replaced by "plan": the compact saved-plan form with
+catalog ids and scores, which is much smaller to write and to store. Use
+"-" to read stdin or write stdout.
+
+Profiles are scored in chunks on a pool of worker processes, each chunk as
+one batch through WellnessRecommendationModel.predict_batch(). Only a few
+chunks per worker are read ahead of the output, so memory stays flat however
+long the input is.
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# One BLAS thread per process; the process pool provides the parallelism
+for variable in ('OPENBLAS_NUM_THREADS', 'OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(variable, '1')
+
+from app import compact_saved_plan, current_catalog, profile_error
+
+PASSTHROUGH_FIELDS = ('username', 'id')
+
+
+def score_chunk(chunk, plans=False):
+    """Score (line number, profile) pairs; returns the output lines"""
+    catalog = current_catalog()
+    results = catalog.model.predict_batch([profile for _, profile in chunk])
+    lines = []
+    for (number, profile), recommendations in zip(chunk, results):
+        record = {'line': number}
+        record.update((field, profile[field]) for field in PASSTHROUGH_FIELDS if field in profile)
+        if plans:
+            record['plan'] = compact_saved_plan({
+                'profile': profile, 'catalog_version': catalog.version, **recommendations})
+        else:
+            record['recommendations'] = recommendations
+            record['catalog_version'] = catalog.version
+        lines.append(json.dumps(record, ensure_ascii=False, default=dict) + '\n')
+    return lines
+
+
+def checked_profile(number, line):
+    """(line number, profile) for one input line; stops the run on a profile that cannot be scored"""
+    profile = json.loads(line)
+    error = profile_error(profile)
+    if error:
+        sys.exit(f"line {number}: {error}")
+    return number, profile
+
+
+def read_chunks(f, chunk_size):
+    """(line number, profile) pairs from a JSONL file, chunk_size at a time"""
+    profiles = (checked_profile(number, line) for number, line in enumerate(f, 1) if line.strip())
+    while True:
+        chunk = list(islice(profiles, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_scored(chunks, target, executor, window, plans=False):
+    """Score chunks on executor and write their lines to target in input order.
+
+    At most window chunks are submitted and not yet written, so the input is
+    read only as fast as the output is written. Returns the profile count.
+    """
+    scored = 0
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(score_chunk, chunk, plans))
+        if len(pending) >= window:
+            lines = pending.popleft().result()
+            target.writelines(lines)
+            scored += len(lines)
+    while pending:
+        lines = pending.popleft().result()
+        target.writelines(lines)
+        scored += len(lines)
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score user profiles in bulk")
+    parser.add_argument('profiles', help="JSONL file of profiles, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL file to write, or - for stdout")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--chunk-size', type=int, default=500, help="profiles scored per batch")
+    parser.add_argument('--plans', action='store_true',
+                        help="write compact saved plans (catalog ids and scores) instead of full items")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.profiles == '-' else open(args.profiles)
+    target = sys.stdout if args.output == '-' else open(args.output, 'w')
+    workers = args.workers or 1
+    with source, target, ProcessPoolExecutor(max_workers=workers) as executor:
+        # Two chunks per worker keep every worker busy while the oldest
+        # chunk's lines are written
+        scored = write_scored(read_chunks(source, args.chunk_size), target, executor, 2 * workers, args.plans)
+
+    print(f"Scored {scored} profiles", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot paths: search, recommendations, sign-in/sign-up and saved plans.
+
+Usage:
+    python benchmark.py [--scale 10] [--users 100] [--plans 5] [--iterations 200]
+                        [--output baseline.json] [--compare baseline.json]
+
+Everything runs against synthetic data in a temporary directory, so data/ is
+never touched. The catalogs are the real ones repeated --scale times, with
+fresh ids, names and condition lists for every copy. --users users (also
+multiplied by --scale) each get --plans saved plans. Each path is timed as a
+direct call and through the Flask test client. The report gives p50/p99
+latency, throughput and peak traced memory, and can be saved as a JSON
+baseline that later runs --compare against.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from werkzeug.security import generate_password_hash
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CATALOGS = ('yoga_poses', 'ayurvedic_remedies', 'pranayama_exercises')
+PASSWORD = 'benchmark-password'
+# Users that get a real password hash, for the sign-in benchmarks. The rest
+# get a one-round hash so generating thousands of users stays quick.
+REAL_HASH_USERS = 5
+
+
+def synthetic_catalog(items, scale, conditions, rng):
+    """The catalog repeated scale times; copies get new ids, names and conditions"""
+    catalog = [dict(item) for item in items]
+    for copy in range(1, scale):
+        for item in items:
+            clone = dict(item)
+            clone['id'] = f"{item['id']}-{copy}"
+            clone['name'] = f"{item['name']} {copy}"
+            clone['conditions'] = rng.sample(conditions, min(len(item.get('conditions', [])), len(conditions)))
+            catalog.append(clone)
+    return catalog
+
+
+def random_profile(conditions, rng):
+    return {
+        'symptoms': rng.sample(conditions, rng.randint(1, 4)),
+        'body_parts': rng.sample(['Back', 'Neck', 'Shoulders', 'Knees', 'Hips', 'Stomach'], rng.randint(0, 2)),
+        'experience': rng.choice(['Beginner', 'Intermediate', 'Advanced']),
+        'time_available': rng.choice(['10', '15', '30', '45']),
+    }
+
+
+def write_catalogs(data_dir, scale, rng):
+    """Write the scaled catalogs into data_dir; returns (catalogs, condition names)"""
+    catalogs = []
+    for name in CATALOGS:
+        with open(os.path.join(ROOT, 'data', f'{name}.json'), encoding='utf-8') as f:
+            catalogs.append(json.load(f))
+    conditions = sorted({cond for items in catalogs for item in items for cond in item.get('conditions', [])})
+
+    scaled = []
+    for name, items in zip(CATALOGS, catalogs):
+        items = synthetic_catalog(items, scale, conditions, rng)
+        with open(os.path.join(data_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False)
+        scaled.append(items)
+    return scaled, conditions
+
+
+def synthetic_plan(catalogs, conditions, rng, day):
+    """A saved plan in the compact stored form, with random catalog ids and scores"""
+    refs = lambda items: [{'id': item['id'], 'score': round(rng.random(), 2)} for item in rng.sample(items, 3)]
+    return {
+        'schema': 2,
+        'catalog_version': 'benchmark',
+        'profile': random_profile(conditions, rng),
+        'items': {section: refs(items) for section, items in zip(('yoga', 'remedies', 'pranayama'), catalogs)},
+        'mantras': [{'id': 'om', 'score': 0.5}],
+        'saved_at': f'2025-01-{day % 28 + 1:02d}T00:00:{day % 60:02d}',
+    }
+
+
+def populate_storage(app, catalogs, user_count, plans_per_user, conditions, rng):
+    """Fill the app's storage with synthetic users and saved plans; returns the usernames"""
+    real_hash = generate_password_hash(PASSWORD)
+    cheap_hash = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1')
+    users = {}
+    for number in range(user_count):
+        username = f'user{number}'
+        users[username] = {
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': real_hash if number < REAL_HASH_USERS else cheap_hash,
+            'created_at': '2025-01-01T00:00:00',
+        }
+    app.storage.save_users(users)
+
+    app.storage.save_user_recommendations({
+        username: [synthetic_plan(catalogs, conditions, rng, day) for day in range(plans_per_user)]
+        for username in users
+    })
+    return list(users)
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def measure(fn, iterations, warmup=5, memory_iterations=20):
+    """Time iterations calls of fn(i); peak memory comes from a separate traced run"""
+    for i in range(min(warmup, iterations)):
+        fn(i)
+
+    timings = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i in range(min(memory_iterations, iterations)):
+        fn(i)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50) * 1000, 4),
+        'p99_ms': round(percentile(timings, 99) * 1000, 4),
+        'mean_ms': round(elapsed / iterations * 1000, 4),
+        'throughput_per_s': round(iterations / elapsed, 1),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def benchmarks(app, usernames, conditions, args, rng):
+    """(name, iterations, fn) for every benchmark; fn takes the iteration number"""
+    catalog = app.current_catalog()
+    items = [*catalog.yoga_poses, *catalog.ayurvedic_remedies, *catalog.pranayama_exercises]
+    words = [word for item in items[:200] for word in item['name'].lower().split()]
+    queries = [rng.choice(conditions).lower() for _ in range(50)] + [rng.choice(words) for _ in range(50)]
+    profiles = [random_profile(conditions, rng) for _ in range(200)]
+    client = app.app.test_client()
+
+    # A signed-in client for the save and saved-plan benchmarks
+    saver = app.app.test_client()
+    saver.post('/login', data={'action': 'signin', 'username': usernames[0], 'password': PASSWORD})
+    plan = app.compact_saved_plan({**catalog.model.predict_recommendations(profiles[0]), 'profile': profiles[0]})
+    new_users = (f'new{time.time_ns()}_{i}' for i in range(10 ** 9))
+
+    def create_direct(i):
+        username = next(new_users)
+        app.create_user(username, f'{username}@example.com', PASSWORD)
+
+    def create_http(i):
+        username = next(new_users)
+        client.post('/login', data={'action': 'signup', 'signup_username': username,
+                                    'email': f'{username}@example.com', 'signup_password': PASSWORD,
+                                    'confirm_password': PASSWORD})
+
+    n, auth_n = args.iterations, args.auth_iterations
+    return [
+        ('search.direct', n, lambda i: catalog.search_index.ranked_search(queries[i % len(queries)], 20)),
+        ('search.http', n, lambda i: client.get('/api/search', query_string={'q': queries[i % len(queries)]})),
+        ('recommend.direct', n, lambda i: catalog.model.predict_recommendations(profiles[i % len(profiles)])),
+        ('recommend.http', n, lambda i: client.post('/api/recommendations', json=profiles[i % len(profiles)])),
+        ('recommend.batch_100.direct', max(n // 10, 1), lambda i: catalog.model.predict_batch(profiles[:100])),
+        ('auth.verify.direct', auth_n,
+         lambda i: app.verify_user(usernames[i % REAL_HASH_USERS], PASSWORD)),
+        ('auth.verify.http', auth_n,
+         lambda i: app.app.test_client().post('/login', data={
+             'action': 'signin', 'username': usernames[i % REAL_HASH_USERS], 'password': PASSWORD})),
+        ('auth.create.direct', auth_n, create_direct),
+        ('auth.create.http', auth_n, create_http),
+        ('save.direct', n, lambda i: app.storage.add_user_recommendation(
+            usernames[i % len(usernames)], {**plan, 'saved_at': datetime.now().isoformat()})),
+        ('save.http', n, lambda i: saver.post('/api/save_recommendations', json=plan)),
+        ('saved_plans.read.http', n, lambda i: saver.get('/api/my-recommendations')),
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results, baseline=None):
+    print(f"{'benchmark':28} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>10} {'peak KB':>10}")
+    for name, result in results.items():
+        line = (f"{name:28} {result['p50_ms']:10.3f} {result['p99_ms']:10.3f} "
+                f"{result['throughput_per_s']:10.1f} {result['peak_memory_kb']:10.1f}")
+        previous = (baseline or {}).get(name)
+        if previous and previous['p50_ms']:
+            line += f"   p50 x{result['p50_ms'] / previous['p50_ms']:.2f}"
+            if previous['p99_ms']:
+                line += f" p99 x{result['p99_ms'] / previous['p99_ms']:.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search, recommendations, auth and saves")
+    parser.add_argument('--scale', type=int, default=1, help="multiply catalogs, users and plans (1-1000)")
+    parser.add_argument('--users', type=int, default=100, help="synthetic users at scale 1")
+    parser.add_argument('--plans', type=int, default=5, help="saved plans per user")
+    parser.add_argument('--iterations', type=int, default=200, help="calls per benchmark")
+    parser.add_argument('--auth-iterations', type=int, default=10,
+                        help="calls per password hashing benchmark, which are slow by design")
+    parser.add_argument('--storage', choices=('json', 'sqlite'), default='json', help="storage backend")
+    parser.add_argument('--with-cache', action='store_true',
+                        help="leave the recommendation result cache on (off by default, to time scoring)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', help="run only benchmarks whose name starts with this prefix")
+    parser.add_argument('--output', help="write results as a JSON baseline")
+    parser.add_argument('--compare', help="baseline JSON to compare against")
+    args = parser.parse_args()
+    # Paths given on the command line are relative to where it was run
+    args.output = args.output and os.path.abspath(args.output)
+    args.compare = args.compare and os.path.abspath(args.compare)
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='ayushastra-bench-')
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(data_dir)
+    catalogs, conditions = write_catalogs(data_dir, args.scale, rng)
+
+    # The app reads data/ relative to the working directory and its settings
+    # from the environment, so both are set before it is imported
+    os.chdir(workdir)
+    os.environ.update({
+        'STORAGE_BACKEND': args.storage,
+        'SQLITE_DATABASE': os.path.join(data_dir, 'bench.db'),
+        'CATALOG_SNAPSHOT': os.path.join(data_dir, 'catalog.snapshot'),
+        'CATALOG_WATCH_INTERVAL': '0',
+    })
+    if not args.with_cache:
+        os.environ['RECOMMENDATION_CACHE_SIZE'] = '0'
+    sys.path.insert(0, ROOT)
+    import app
+
+    app.storage.initialize()
+    usernames = populate_storage(app, catalogs, args.users * args.scale, args.plans, conditions, rng)
+    print(f"Catalog items: {sum(len(items) for items in catalogs)}, users: {len(usernames)}, "
+          f"saved plans: {len(usernames) * args.plans}")
+
+    results = {}
+    for name, iterations, fn in benchmarks(app, usernames, conditions, args, rng):
+        if args.only and not name.startswith(args.only):
+            continue
+        results[name] = measure(fn, iterations)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_report(results, baseline)
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'scale': args.scale,
+                'users': len(usernames),
+                'plans_per_user': args.plans,
+                'catalog_items': sum(len(items) for items in catalogs),
+                'storage': args.storage,
+                'result_cache': args.with_cache,
+                'seed': args.seed,
+                'created_at': datetime.now().isoformat(),
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
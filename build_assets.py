@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Prepare the files under static/ for serving from content-hashed URLs.
+
+Usage:
+    python build_assets.py [--thumbnail-size 640]
+
+Writes static/assets-manifest.json with a hash for every static file.
+Text assets such as SVGs also get a gzip copy next to them. With Pillow
+installed (pip install Pillow), each raster image shown on a catalog card
+gets a WebP thumbnail under static/thumbs/.
+Run it as part of the deploy build, after adding or replacing images.
+"""
+
+import argparse
+import gzip
+import json
+import os
+
+from app import (PRECOMPRESSED_TYPES, STATIC_MANIFEST_FILE, app, current_catalog, file_digest,
+                 static_filename)
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+THUMBNAIL_DIR = 'thumbs'
+RASTER_TYPES = ('.png', '.jpg', '.jpeg')
+
+
+def card_images():
+    """Static paths of the raster images shown on catalog cards"""
+    catalog = current_catalog()
+    images = set()
+    for item in [*catalog.yoga_poses, *catalog.ayurvedic_remedies, *catalog.pranayama_exercises]:
+        image = item.get('image')
+        if image and image.lower().endswith(RASTER_TYPES):
+            images.add(static_filename(image))
+    return sorted(images)
+
+
+def write_thumbnail(root, filename, size):
+    """Write a WebP thumbnail of a static image; returns its static path, or None"""
+    source = os.path.join(root, filename)
+    if not os.path.isfile(source):
+        return None
+    thumbnail = os.path.join(THUMBNAIL_DIR, os.path.splitext(filename)[0] + '.webp')
+    target = os.path.join(root, thumbnail)
+    if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(source):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with Image.open(source) as image:
+            image.thumbnail((size, size))
+            image.save(target, 'WEBP', quality=80)
+    return thumbnail.replace(os.sep, '/')
+
+
+def write_gzip(path):
+    """Write a gzip copy at path.gz; returns False, writing nothing, if it would not be smaller"""
+    with open(path, 'rb') as f:
+        body = f.read()
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(compressed) >= len(body):
+        return False
+    with open(path + '.gz', 'wb') as f:
+        f.write(compressed)
+    return True
+
+
+def build(root, thumbnail_size):
+    """Write thumbnails, gzip copies and the manifest; returns the manifest"""
+    thumbnails = {}
+    if Image is None:
+        print("Pillow is not installed, skipping thumbnails")
+    else:
+        for filename in card_images():
+            thumbnail = write_thumbnail(root, filename, thumbnail_size)
+            if thumbnail:
+                thumbnails[filename] = thumbnail
+
+    files = {}
+    manifest_path = os.path.abspath(STATIC_MANIFEST_FILE)
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            if name.endswith('.gz') or os.path.abspath(path) == manifest_path:
+                continue
+            stat = os.stat(path)
+            files[os.path.relpath(path, root).replace(os.sep, '/')] = {
+                'hash': file_digest(path),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'gzip': name.lower().endswith(PRECOMPRESSED_TYPES) and write_gzip(path),
+            }
+
+    manifest = {'files': files, 'thumbnails': thumbnails}
+    tmp_path = f"{STATIC_MANIFEST_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATIC_MANIFEST_FILE)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash static files and build thumbnails")
+    parser.add_argument('--thumbnail-size', type=int, default=640,
+                        help="longest side of catalog card thumbnails, in pixels")
+    args = parser.parse_args()
+
+    manifest = build(app.static_folder, args.thumbnail_size)
+    print(f"Hashed {len(manifest['files'])} files and wrote {len(manifest['thumbnails'])} thumbnails "
+          f"to {STATIC_MANIFEST_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Compile the catalog JSON files into the binary snapshot that app workers map
+into memory at startup.
+
+Usage:
+    python build_catalog.py [--output data/catalog.snapshot]
+
+Run it as part of the deploy build, and again after editing the catalog
+files. Workers parse the JSON instead whenever the snapshot is missing or
+was built from different files.
+"""
+
+import argparse
+import hashlib
+import json
+
+from app import CATALOG_FILES, CATALOG_SNAPSHOT_FILE, write_catalog_snapshot
+
+
+def build(output):
+    """Write the snapshot for the current catalog files; returns (version, record counts)"""
+    digest = hashlib.sha1()
+    catalogs = []
+    for path in CATALOG_FILES:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest.update(raw)
+        catalogs.append(json.loads(raw))
+
+    version = digest.hexdigest()[:12]
+    write_catalog_snapshot(output, catalogs, version)
+    return version, [len(items) for items in catalogs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the binary catalog snapshot")
+    parser.add_argument('--output', default=CATALOG_SNAPSHOT_FILE, help="snapshot file to write")
+    args = parser.parse_args()
+
+    version, counts = build(args.output)
+    print(f"Wrote catalog version {version} ({sum(counts)} records) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Import the JSON user and saved recommendation files into the SQLite storage
+backend.
+
+Usage:
+    python migrate_storage.py [--db data/ayushastra.db]
+
+Then start the app with STORAGE_BACKEND=sqlite. Running the import again
+replaces the SQLite contents with the current JSON files.
+"""
+
+import argparse
+
+from app import (JSONStorage, SQLiteStorage, SQLITE_DATABASE, USERS_FILE, USER_RECOMMENDATIONS_FILE,
+                 USER_RECOMMENDATIONS_JOURNAL)
+
+
+def migrate(source, target):
+    """Copy all users and saved recommendations from source to target"""
+    users = source.load_users()
+    recommendations = source.load_user_recommendations()
+
+    target.save_users(users)
+    target.save_user_recommendations(recommendations)
+
+    plans = sum(len(user_plans) for user_plans in recommendations.values())
+    return len(users), plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import JSON storage files into SQLite")
+    parser.add_argument('--db', default=SQLITE_DATABASE, help="SQLite database to write")
+    parser.add_argument('--users', default=USERS_FILE, help="users JSON file to import")
+    parser.add_argument('--recommendations', default=USER_RECOMMENDATIONS_FILE,
+                        help="legacy saved recommendations JSON file to import")
+    parser.add_argument('--journal', default=USER_RECOMMENDATIONS_JOURNAL,
+                        help="saved recommendations journal to import (read first if it exists)")
+    args = parser.parse_args()
+
+    source = JSONStorage(args.users, args.recommendations, args.journal)
+    target = SQLiteStorage(args.db)
+    users, plans = migrate(source, target)
+
+    print(f"Imported {users} users and {plans} saved recommendations into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,9 @@ Python Flask Application
 Run this script to start the AyushAstra web application.
 """
 
+import json
 import os
+import re
 import sys
 import subprocess
 
@@ -18,8 +20,57 @@ def check_python_version():
         return False
     return True
 
+def requirements_satisfied(path="requirements.txt"):
+    """Check whether every package in requirements.txt is already installed"""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return False
+    try:
+        from packaging.requirements import Requirement, InvalidRequirement
+    except ImportError:
+        Requirement = None
+
+    with open(path) as f:
+        lines = [line.split('#')[0].strip() for line in f]
+    for line in filter(None, lines):
+        if line.startswith('-'):
+            # Included files are checked too; any other option, such as -e .
+            # or --index-url, is something only pip can resolve
+            option, _, included = line.partition(' ')
+            if option not in ('-r', '--requirement') or not included.strip():
+                return False
+            included = os.path.join(os.path.dirname(path), included.strip())
+            try:
+                if not requirements_satisfied(included):
+                    return False
+            except (OSError, RecursionError):  # missing, or files including each other
+                return False
+            continue
+        if Requirement is not None:
+            try:
+                requirement = Requirement(line)
+            except InvalidRequirement:
+                return False
+            name, specifier = requirement.name, requirement.specifier
+        else:
+            match = re.match(r'[A-Za-z0-9._-]+', line)
+            if match is None:
+                return False
+            name, specifier = match.group(0), None
+        try:
+            installed = version(name)
+        except PackageNotFoundError:
+            return False
+        if specifier and not specifier.contains(installed, prereleases=True):
+            return False
+    return True
+
 def install_requirements():
     """Install required packages"""
+    if requirements_satisfied():
+        print("Requirements already satisfied, skipping installation")
+        return True
     print("Installing required packages...")
     try:
         subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
@@ -36,7 +87,46 @@ def create_directories():
         os.makedirs(directory, exist_ok=True)
     print("Directories created successfully!")
 
+def startup_report():
+    """Print where the time goes when a fresh process imports the app and loads the catalogs"""
+    code = "import app, json; app.current_catalog(); print(json.dumps(app.startup_timings))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr)
+        return
+
+    # -X importtime writes "import time: self | cumulative | name" per module,
+    # children before their parent and indented by nesting depth. Report the
+    # top-level imports (the app, and anything it imports lazily later) and
+    # the modules the app imports directly.
+    imports, children = [], []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)', line)
+        if not match:
+            continue
+        ms, depth, name = int(match.group(1)) / 1000, (len(match.group(2)) - 1) // 2, match.group(3)
+        if depth == 1:
+            children.append((ms, name))
+        elif depth == 0:
+            imports.append((ms, name, sorted(children, reverse=True) if name == 'app' else []))
+            children = []
+    stages = json.loads(result.stdout.strip().splitlines()[-1])
+
+    print("Imports (cumulative ms)")
+    for ms, name, app_imports in sorted(imports, reverse=True)[:10]:
+        print(f"  {ms:9.1f}  {name}")
+        for child_ms, child in app_imports[:15]:
+            print(f"  {child_ms:9.1f}    {child}")
+    print("Startup stages (ms)")
+    for name, seconds in stages.items():
+        print(f"  {seconds * 1000:9.1f}  {name}")
+
 def main():
+    if "--startup-report" in sys.argv:
+        startup_report()
+        return
+
     print("Welcome to AyushAstra - Your Holistic Wellness Guide")
     print("=" * 60)
     print()
@@ -0,0 +1,58 @@
+"""
+Test setup: the app is imported against copies of the data files in a
+temporary directory, since app.py reads data/ relative to the working
+directory when it is imported.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKDIR = Path(tempfile.mkdtemp(prefix='ayushastra-tests-'))
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+
+
+def pytest_sessionstart(session):
+    # After pytest has found the tests, before any test module imports the app
+    shutil.copytree(ROOT / 'data', WORKDIR / 'data',
+                    ignore=shutil.ignore_patterns('*.db*', '*.jsonl*', '*.snapshot*', '*.lock', '*.tmp'))
+    os.chdir(WORKDIR)
+    os.environ.update({
+        'STORAGE_BACKEND': 'json',
+        'CATALOG_WATCH_INTERVAL': '0',
+        'RECOMMENDATION_SECTION_WORKERS': '0',
+        'PASSWORD_HASH_WORKERS': '1',
+    })
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """A fresh JSON storage backend in place of the app's"""
+    import app
+    backend = app.JSONStorage(str(tmp_path / 'users.json'), str(tmp_path / 'user_recommendations.json'),
+                              str(tmp_path / 'user_recommendations.jsonl'))
+    backend.initialize()
+    monkeypatch.setattr(app, 'storage', app.InstrumentedStorage(backend))
+    return backend
+
+
+@pytest.fixture
+def client(storage):
+    import app
+    return app.app.test_client()
+
+
+@pytest.fixture
+def logged_in_client(client):
+    """A test client signed in as 'tester'"""
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['username'] = 'tester'
+    return client
@@ -0,0 +1,58 @@
+import json
+import sys
+from concurrent.futures import Future
+
+import batch_recommend
+
+
+class InlineExecutor:
+    """Scores each chunk as it is submitted"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class Recorder:
+    """Output file that notes how many chunks had been read at each write"""
+
+    def __init__(self, chunks_read):
+        self.chunks_read = chunks_read
+        self.lines = []
+        self.read_at_write = []
+
+    def writelines(self, lines):
+        self.read_at_write.append(self.chunks_read[0])
+        self.lines += lines
+
+
+def test_output_is_written_while_input_is_read():
+    profiles = [(number, {'symptoms': ['Stress'], 'username': f'user{number}'}) for number in range(1, 21)]
+    chunks_read = [0]
+
+    def chunks():
+        for start in range(0, len(profiles), 2):
+            chunks_read[0] += 1
+            yield profiles[start:start + 2]
+
+    target = Recorder(chunks_read)
+    assert batch_recommend.write_scored(chunks(), target, InlineExecutor(), window=3) == 20
+    # Never more than the window of chunks read ahead of the output
+    assert target.read_at_write == [3, 4, 5, 6, 7, 8, 9, 10, 10, 10]
+    assert [json.loads(line)['line'] for line in target.lines] == list(range(1, 21))
+
+
+def test_command_line(tmp_path, monkeypatch, capsys):
+    source = tmp_path / 'profiles.jsonl'
+    source.write_text('\n'.join(json.dumps({'username': f'user{n}', 'symptoms': ['Stress']}) for n in range(5)) + '\n',
+                      encoding='utf-8')
+    output = tmp_path / 'out.jsonl'
+    monkeypatch.setattr(sys, 'argv', ['batch_recommend.py', str(source), '-o', str(output),
+                                      '--workers', '1', '--chunk-size', '2', '--plans'])
+    batch_recommend.main()
+
+    records = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert [record['username'] for record in records] == [f'user{n}' for n in range(5)]
+    assert all(record['plan']['items']['yoga'] for record in records)
+    assert 'Scored 5 profiles' in capsys.readouterr().err
@@ -0,0 +1,49 @@
+import pytest
+
+import app
+
+
+def test_batch_matches_single_profile_scoring(client):
+    profiles = [
+        {'symptoms': ['Stress', 'Back Pain'], 'body_parts': ['Lower Back'], 'experience': 'Beginner',
+         'time_available': '15'},
+        {'symptoms': ['Anxiety'], 'experience': 'Advanced', 'time_available': 60},
+        {},
+    ]
+    response = client.post('/api/recommendations/batch', json={'profiles': profiles})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert len(results) == len(profiles)
+
+    model = app.current_catalog().model
+    for profile, result in zip(profiles, results):
+        expected = model.predict_recommendations(profile)
+        for section in app.RECOMMENDATION_SECTIONS:
+            assert [item['id'] for item in result[section]] == [item['id'] for item in expected[section]]
+
+
+@pytest.mark.parametrize('profile, field', [
+    ({'symptoms': [1, 2]}, 'symptoms'),
+    ({'body_parts': [None]}, 'body_parts'),
+    ({'symptoms': 'Stress'}, 'symptoms'),
+    ({'time_available': 'soon'}, 'time_available'),
+    ({'experience': ['Beginner']}, 'experience'),
+])
+def test_malformed_profile_is_rejected_with_its_index(client, profile, field):
+    response = client.post('/api/recommendations/batch', json={'profiles': [{'symptoms': ['Stress']}, profile]})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['index'] == 1
+    assert field in body['error']
+
+
+@pytest.mark.parametrize('payload', [None, [], {'profiles': 'all'}, {'profiles': [5]}])
+def test_request_without_a_profile_list_is_rejected(client, payload):
+    response = client.post('/api/recommendations/batch', json=payload)
+    assert response.status_code == 400
+
+
+def test_batch_size_is_capped(client, monkeypatch):
+    monkeypatch.setattr(app, 'RECOMMENDATION_BATCH_MAX', 2)
+    response = client.post('/api/recommendations/batch', json={'profiles': [{}, {}, {}]})
+    assert response.status_code == 413
@@ -0,0 +1,89 @@
+import gzip
+import json
+
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize('url, catalog', [
+    ('/api/yoga/{}', 'yoga_poses'),
+    ('/api/remedies/{}', 'ayurvedic_remedies'),
+    ('/api/pranayama/{}', 'pranayama_exercises'),
+])
+def test_item_detail(client, url, catalog):
+    item = getattr(app.current_catalog(), catalog)[-1]
+    response = client.get(url.format(item['id']))
+    assert response.status_code == 200
+    assert response.get_json()['name'] == item['name']
+
+    response = client.get(url.format('no-such-item'))
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def yoga_url():
+    with app.app.test_request_context():
+        return app.catalog_url('yoga')
+
+
+def catalog_items():
+    # Records hold tuples, which the endpoint sends as JSON arrays
+    return json.loads(json.dumps(app.current_catalog().yoga_poses))
+
+
+def test_catalog_json_gzip(client, yoga_url):
+    response = client.get(yoga_url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert json.loads(gzip.decompress(response.data)) == catalog_items()
+
+
+@pytest.mark.skipif(app.brotli is None, reason="needs brotli")
+def test_catalog_json_brotli(client, yoga_url):
+    response = client.get(yoga_url, headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(app.brotli.decompress(response.data)) == catalog_items()
+
+
+def test_catalog_json_identity(client, yoga_url):
+    response = client.get(yoga_url, headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == catalog_items()
+
+
+def test_catalog_json_conditional(client, yoga_url):
+    first = client.get(yoga_url, headers={'Accept-Encoding': 'gzip'})
+    again = client.get(yoga_url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_stale_catalog_version_redirects(client, yoga_url):
+    response = client.get('/api/catalog/yoga.0123456789abcdef.json')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(yoga_url)
+
+
+@pytest.mark.parametrize('filename', ['mantras.0123456789abcdef.json', 'yoga.txt'])
+def test_unknown_catalog(client, filename):
+    assert client.get(f'/api/catalog/{filename}').status_code == 404
+
+
+def test_repeated_ids_show_the_first_record_and_score_the_last(caplog):
+    first = {'id': 'oil', 'name': 'Oil', 'conditions': ['Dull skin']}
+    last = {'id': 'oil', 'name': 'Oil', 'conditions': ['Dull skin', 'Pigmentation']}
+    other = {'id': 'tea', 'name': 'Tea', 'conditions': ['Stress']}
+    registry = app.CatalogRegistry([], [first, other, last], [])
+    assert 'repeats ids' in caplog.text and 'oil' in caplog.text
+
+    assert registry.get('remedies', 'oil') is first
+    assert registry.items('remedies') == [first, other]
+    assert registry.scored_items('remedies') == [last, other]
+
+    # A symptom only the later record lists still recommends the item
+    model = app.WellnessRecommendationModel(registry, app.ConditionVocabulary([last['conditions'], ['Stress']]))
+    remedies = model.predict_recommendations({'symptoms': ['Pigmentation']})['remedies']
+    assert remedies[0]['id'] == 'oil' and remedies[0]['confidence_score'] > 0
+    assert [item['id'] for item in remedies] == ['oil', 'tea']
@@ -0,0 +1,88 @@
+import json
+import shutil
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def catalog_files(tmp_path, monkeypatch):
+    """Copies of the catalog files, with no binary snapshot"""
+    files = []
+    for path in app.CATALOG_FILES:
+        copy = tmp_path / path.rsplit('/', 1)[-1]
+        shutil.copy(path, copy)
+        files.append(str(copy))
+    monkeypatch.setattr(app, 'CATALOG_FILES', tuple(files))
+    monkeypatch.setattr(app, 'CATALOG_SNAPSHOT_FILE', str(tmp_path / 'catalog.snapshot'))
+    return files
+
+
+def rewrite(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def test_reload_swaps_in_changed_catalog(catalog_files):
+    manager = app.CatalogManager(catalog_files, watch_interval=0)
+    first = manager.current()
+    assert manager.reload() is False
+
+    with open(catalog_files[0], encoding='utf-8') as f:
+        poses = json.load(f)
+    rewrite(catalog_files[0], json.dumps(poses[:1]))
+    assert manager.reload() is True
+    assert manager.current() is not first
+    assert manager.current().version != first.version
+    assert len(manager.current().yoga_poses) == 1
+    # Requests that already hold the old snapshot keep a consistent view
+    assert len(first.yoga_poses) == len(poses)
+
+
+def test_failed_reload_keeps_current_catalog(catalog_files):
+    manager = app.CatalogManager(catalog_files, watch_interval=0)
+    first = manager.current()
+
+    rewrite(catalog_files[1], '[{"id": "half written"')
+    assert manager.reload() is False
+    assert manager.current() is first
+    assert manager.reloads == 1
+    assert manager.last_error
+
+    # The broken file is retried, and a fixed one is picked up
+    rewrite(catalog_files[1], '[]')
+    assert manager.reload() is True
+    assert manager.last_error is None
+    assert len(manager.current().ayurvedic_remedies) == 0
+
+
+def test_first_load_failure_raises(catalog_files):
+    rewrite(catalog_files[2], 'not json')
+    manager = app.CatalogManager(catalog_files, watch_interval=0)
+    with pytest.raises(ValueError):
+        manager.current()
+
+
+@pytest.mark.parametrize('content', [
+    '{"id": "not a list"}',
+    '[{"name": "No id", "conditions": []}]',
+    '[["not", "a", "record"]]',
+])
+def test_badly_shaped_file_keeps_current_catalog(catalog_files, content):
+    manager = app.CatalogManager(catalog_files, watch_interval=0)
+    first = manager.current()
+
+    rewrite(catalog_files[0], content)
+    manager.reload_in_background()
+    for thread in threading.enumerate():
+        if thread.name == 'catalog-reload':
+            thread.join(5)
+    assert manager.current() is first
+    assert manager.last_error
+
+    # Hot reload keeps working once the file is fixed
+    rewrite(catalog_files[0], '[]')
+    assert manager.reload() is True
+    assert manager.last_error is None
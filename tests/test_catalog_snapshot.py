@@ -0,0 +1,72 @@
+import copy
+import pickle
+
+import pytest
+
+import app
+
+CATALOGS = [
+    [{'id': 'tree', 'name': 'Tree Pose', 'conditions': ['Stress', 'Back Pain'], 'duration': '5 min'},
+     {'id': 'cat', 'name': 'Cat Pose', 'conditions': [], 'steps': {'count': 3}}],
+    [{'id': 'tulsi', 'name': 'Tulsi Tea', 'conditions': ['Stress'], 'benefits': ['Calm', 'Immunity']}],
+    [],
+]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = str(tmp_path / 'catalog.snapshot')
+    app.write_catalog_snapshot(path, CATALOGS, 'v1')
+    return path
+
+
+def test_snapshot_round_trip(snapshot_path):
+    snapshot = app.open_catalog_snapshot(snapshot_path, 'v1')
+    assert snapshot.version == 'v1'
+    catalogs = snapshot.catalogs()
+    assert [len(items) for items in catalogs] == [2, 1, 0]
+    for items, expected in zip(catalogs, CATALOGS):
+        assert [dict(record) for record in items] == [dict(app.freeze_record(item)) for item in expected]
+
+
+def test_mapped_record_behaves_like_catalog_record(snapshot_path):
+    record = app.open_catalog_snapshot(snapshot_path, 'v1').catalogs()[0][0]
+    assert isinstance(record, app.MappedRecord)
+    assert record['conditions'] == ('Stress', 'Back Pain')
+    assert record == app.freeze_record(CATALOGS[0][0])
+    assert len(record) == 4
+    assert record.get('steps') is None
+    with pytest.raises(KeyError):
+        record['missing']
+    assert copy.deepcopy(record) is record
+    # Pickling detaches the record from the mapped file
+    restored = pickle.loads(pickle.dumps(record))
+    assert type(restored) is app.CatalogRecord
+    assert restored == record
+
+
+def test_stale_snapshot_is_ignored(snapshot_path):
+    assert app.open_catalog_snapshot(snapshot_path, 'v2') is None
+
+
+@pytest.mark.parametrize('content', [b'', b'not a snapshot', b'AYCS\x63\x00' + b'\0' * 20])
+def test_unreadable_snapshot_is_ignored(tmp_path, content):
+    path = tmp_path / 'catalog.snapshot'
+    path.write_bytes(content)
+    assert app.open_catalog_snapshot(str(path), 'v1') is None
+
+
+def test_missing_snapshot_is_ignored(tmp_path):
+    assert app.open_catalog_snapshot(str(tmp_path / 'none.snapshot'), 'v1') is None
+
+
+def test_load_data_uses_a_current_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'CATALOG_SNAPSHOT_FILE', str(tmp_path / 'catalog.snapshot'))
+    *parsed, version = app.load_data()
+    assert all(type(record) is app.CatalogRecord for items in parsed for record in items)
+
+    app.write_catalog_snapshot(app.CATALOG_SNAPSHOT_FILE, parsed, version)
+    *mapped, mapped_version = app.load_data()
+    assert mapped_version == version
+    assert all(type(record) is app.MappedRecord for items in mapped for record in items)
+    assert mapped == parsed
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize('spelling, canonical', [
+    ('Back Pain', 'back pain'),
+    ('  back   PAIN ', 'back pain'),
+    ('Cold & Cough', 'cold and cough'),
+    ('Jaw tension (TMJ)', 'jaw tension tmj'),
+    ('Hypertension', 'high blood pressure'),
+    ('Headaches', 'headache'),
+])
+def test_normalize_condition(spelling, canonical):
+    assert app.normalize_condition(spelling) == canonical
+
+
+def test_vocabulary_folds_spellings_onto_one_id():
+    vocabulary = app.ConditionVocabulary([['Back pain', 'Stress'], ['Back Pain'], ['Back Pain', 'IBS']])
+    assert len(vocabulary) == 3
+    assert vocabulary.id('back pain') == vocabulary.id('Back pain') == vocabulary.id('BACK PAIN')
+    # The most common spelling is the one shown
+    assert vocabulary.canonical('back pain') == 'Back Pain'
+    assert vocabulary.canonical('Irritable Bowel Syndrome') == 'IBS'
+    assert vocabulary.id('Unknown') is None
+    assert vocabulary.canonical('Unknown') == 'Unknown'
+
+
+def test_masks_overlap_by_shared_conditions():
+    vocabulary = app.ConditionVocabulary([['Stress', 'Anxiety', 'Insomnia', 'Fatigue']])
+    mask = vocabulary.mask(['stress', 'Insomnia', 'Unknown'])
+    assert sorted(app.mask_bits(mask)) == [vocabulary.id('Stress'), vocabulary.id('Insomnia')]
+    assert (mask & vocabulary.mask(['Insomnia', 'Fatigue'])).bit_count() == 1
+    assert vocabulary.mask([]) == 0
+
+
+def test_search_condition_filter_ignores_spelling(client):
+    totals = [
+        client.get('/api/search', query_string={'q': 'pose', 'condition': condition, 'fuzzy': 'off'}).get_json()['total']
+        for condition in ('Back Pain', 'back pain', 'BACK-PAIN')
+    ]
+    assert totals[0] == totals[1] == totals[2]
+    assert sum(totals[0].values()) > 0
+
+
+def test_symptoms_match_in_any_spelling():
+    model = app.current_catalog().model
+    profile = {'symptoms': ['Back Pain', 'Stress'], 'experience': 'Beginner', 'time_available': '30'}
+    variant = {**profile, 'symptoms': ['back pain', 'STRESS']}
+    expected = model.predict_recommendations(profile)
+    actual = model.predict_recommendations(variant)
+    for section in app.RECOMMENDATION_SECTIONS:
+        assert [item['id'] for item in actual[section]] == [item['id'] for item in expected[section]]
+
+
+@pytest.fixture
+def exact_catalog(monkeypatch):
+    """A catalog snapshot built with CONDITION_FOLDING off"""
+    monkeypatch.setattr(app, 'CONDITION_FOLDING', False)
+    return app.CatalogSnapshot(*app.load_data())
+
+
+def test_folding_off_keeps_each_spelling(exact_catalog):
+    conditions = exact_catalog.conditions
+    assert conditions.id('Back Pain') != conditions.id('Back pain')
+    assert conditions.id('back pain') is None
+
+
+def test_folding_off_scores_like_exact_list_scans(exact_catalog):
+    """With folding off, symptom matching counts exactly what `symptom in conditions` did"""
+    model = exact_catalog.model
+    names = list(exact_catalog.conditions.names)
+    rng = random.Random(7)
+    for _ in range(200):
+        symptoms = rng.sample(names, rng.randint(0, 5)) + ['Not A Condition']
+        features = model._features([{'symptoms': symptoms}])
+        for matrix in (model.yoga, model.remedies, model.pranayama):
+            matches = matrix.symptom_matches(features['symptom_pairs'], 1)[0]
+            expected = [sum(symptom in item.get('conditions', []) for symptom in symptoms)
+                        for item in matrix.scored_items]
+            assert matches.tolist() == expected
+
+        mantras = {item['id']: item['confidence_score'] for item in model._mantras_for(features['symptom_masks'][0])}
+        for mantra_id, score in mantras.items():
+            hits = sum(symptom in app.MANTRA_CONDITIONS[mantra_id] for symptom in symptoms)
+            assert score == min(7 * hits / 14, 1.0)
+
+
+def test_folding_off_filters_by_exact_spelling(exact_catalog):
+    for name, index in exact_catalog.search_index.catalogs.items():
+        everything = set(range(len(index.items)))
+        for condition in ('Back Pain', 'Back pain', 'back pain'):
+            matched = index.apply_filters(set(everything), 'all', condition)
+            assert matched == {position for position, item in enumerate(index.items)
+                               if condition in item.get('conditions', [])}
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'user_recommendations.jsonl')
+
+
+def plan(day, name=None):
+    return {'saved_at': f'2024-01-{day:02d}T00:00:00', 'name': name or f'plan {day}'}
+
+
+def names(plans):
+    return [p['name'] for p in plans]
+
+
+def test_append_and_read(path):
+    journal = app.RecommendationJournal(path)
+    assert journal.read('asha') == []
+    journal.append('asha', plan(1))
+    journal.append('ravi', plan(2))
+    journal.append('asha', plan(3))
+
+    assert names(journal.read('asha')) == ['plan 1', 'plan 3']
+    assert journal.read_all() == {'asha': [plan(1), plan(3)], 'ravi': [plan(2)]}
+    # One JSON line per saved plan
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['username'] for line in f] == ['asha', 'ravi', 'asha']
+    # A new instance, e.g. after a restart, indexes the existing file
+    assert names(app.RecommendationJournal(path).read('asha')) == ['plan 1', 'plan 3']
+
+
+def test_read_page(path):
+    journal = app.RecommendationJournal(path)
+    for day in (2, 1, 4, 3):
+        journal.append('asha', plan(day))
+    assert journal.read_page('asha', 3) == ([plan(4), plan(3), plan(2)], True)
+    assert journal.read_page('asha', 3, offset=3) == ([plan(1)], False)
+    assert journal.read_page('asha', 3, before=plan(3)['saved_at']) == ([plan(2), plan(1)], False)
+
+
+def test_legacy_file_is_imported(path, tmp_path):
+    legacy = tmp_path / 'user_recommendations.json'
+    legacy.write_text(json.dumps({'asha': [plan(1), plan(2)]}), encoding='utf-8')
+    journal = app.RecommendationJournal(path, legacy_path=str(legacy))
+    assert names(journal.read('asha')) == ['plan 1', 'plan 2']
+    assert os.path.exists(path)
+
+
+def test_appends_from_other_workers_are_picked_up(path):
+    first, second = app.RecommendationJournal(path), app.RecommendationJournal(path)
+    first.append('asha', plan(1))
+    assert names(second.read('asha')) == ['plan 1']
+    second.append('asha', plan(2))
+    assert names(first.read('asha')) == ['plan 1', 'plan 2']
+
+    # Compaction replaces the file; the other instance re-indexes the new one
+    second.compact()
+    first.append('ravi', plan(3))
+    assert names(first.read('asha')) == ['plan 1', 'plan 2']
+    assert names(second.read('ravi')) == ['plan 3']
+
+
+def test_torn_lines_are_skipped_and_compacted_away(path):
+    journal = app.RecommendationJournal(path)
+    journal.append('asha', plan(1))
+    with open(path, 'ab') as f:
+        f.write(b'{"username": "asha", "pl\n')
+    journal.append('asha', plan(2))
+    assert names(journal.read('asha')) == ['plan 1', 'plan 2']
+
+    journal.compact()
+    with open(path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+    assert names(journal.read('asha')) == ['plan 1', 'plan 2']
+
+
+def test_compaction_groups_plans_by_user(path, monkeypatch):
+    monkeypatch.setattr(app.RecommendationJournal, 'COMPACT_EVERY', 4)
+    journal = app.RecommendationJournal(path)
+    for day, username in enumerate(['asha', 'ravi', 'asha', 'ravi'], 1):
+        journal.append(username, plan(day))
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['username'] for line in f] == ['asha', 'asha', 'ravi', 'ravi']
+    assert journal.read_all() == {'asha': [plan(1), plan(3)], 'ravi': [plan(2), plan(4)]}
+
+
+@pytest.mark.skipif(app.fcntl is None, reason="needs flock")
+def test_compaction_waits_for_the_file_lock(path):
+    journal = app.RecommendationJournal(path)
+    journal.append('asha', plan(1))
+
+    # Another worker in the middle of an append holds the lock
+    with open(path, 'ab') as other:
+        app.lock_file(other)
+        compaction = threading.Thread(target=journal.compact)
+        compaction.start()
+        compaction.join(0.2)
+        assert compaction.is_alive()
+        other.write(json.dumps({'username': 'ravi', 'plan': plan(2)}).encode('utf-8') + b'\n')
+        other.flush()
+    compaction.join(5)
+    assert not compaction.is_alive()
+
+    # The line written while compaction waited is kept
+    assert journal.read_all() == {'asha': [plan(1)], 'ravi': [plan(2)]}
+
+
+def test_workers_starting_together_import_the_legacy_file_once(path, tmp_path):
+    legacy = tmp_path / 'user_recommendations.json'
+    legacy.write_text(json.dumps({'asha': [plan(1), plan(2)]}), encoding='utf-8')
+    journals = [app.RecommendationJournal(path, legacy_path=str(legacy)) for _ in range(8)]
+
+    def start(number, journal):
+        journal.read('asha')
+        journal.append('ravi', plan(10 + number))
+
+    threads = [threading.Thread(target=start, args=item) for item in enumerate(journals)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    data = app.RecommendationJournal(path).read_all()
+    assert data['asha'] == [plan(1), plan(2)]
+    assert sorted(names(data['ravi'])) == sorted(f'plan {10 + number}' for number in range(8))
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_appends_survive_concurrent_compactions(path, tmp_path, monkeypatch):
+    monkeypatch.setattr(app.RecommendationJournal, 'COMPACT_EVERY', 7)
+
+    def worker(username):
+        journal = app.RecommendationJournal(path)
+        for day in range(1, 29):
+            journal.append(username, plan(day))
+
+    threads = [threading.Thread(target=worker, args=(f'user{number}',)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    data = app.RecommendationJournal(path).read_all()
+    assert {username: len(plans) for username, plans in data.items()} == {f'user{n}': 28 for n in range(4)}
+    assert not list(tmp_path.glob('*.tmp'))
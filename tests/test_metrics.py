@@ -0,0 +1,38 @@
+import app
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = app.Histogram('test_seconds', 'Test timings', ('route',), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(('home',), seconds)
+    assert histogram.render() == [
+        '# HELP test_seconds Test timings',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{route="home",le="0.1"} 1',
+        'test_seconds_bucket{route="home",le="1.0"} 3',
+        'test_seconds_bucket{route="home",le="+Inf"} 4',
+        'test_seconds_sum{route="home"} 6.05',
+        'test_seconds_count{route="home"} 4',
+    ]
+    assert histogram.totals() == {('home',): (6.05, 4)}
+
+
+def test_label_values_are_escaped():
+    assert app.metric_labels(('path',), ('a"b\\c\n',)) == '{path="a\\"b\\\\c\\n"}'
+    assert app.metric_labels((), ()) == ''
+
+
+def test_metrics_endpoint(client):
+    client.get('/api/search', query_string={'q': 'stress'})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'ayushastra_request_seconds_count{endpoint="search",method="GET",status="200"}' in text
+    assert '# TYPE ayushastra_result_cache_requests_total counter' in text
+    assert f'ayushastra_catalog_info{{version="{app.current_catalog().version}"}} 1' in text
+
+    # Every sample line is "name{labels} value"
+    for line in text.splitlines():
+        if not line.startswith('#'):
+            float(line.rsplit(' ', 1)[1])
@@ -0,0 +1,75 @@
+import pytest
+
+import app
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """An empty page cache for each test"""
+    cache = app.PageCache()
+    monkeypatch.setattr(app, 'page_cache', cache)
+    return cache
+
+
+def sign_in(client, username):
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['username'] = username
+
+
+def test_repeat_request_is_a_cache_hit(client, cache):
+    first = client.get('/yoga')
+    second = client.get('/yoga')
+    assert first.status_code == second.status_code == 200
+    assert second.data == first.data
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+
+def test_matching_etag_gets_304(client):
+    etag = client.get('/pranayama').headers['ETag']
+    response = client.get('/pranayama', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert client.get('/pranayama', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_each_user_gets_their_own_page(client, cache):
+    anonymous = client.get('/yoga').data
+    sign_in(client, 'asha')
+    asha = client.get('/yoga')
+    sign_in(client, 'ravi')
+    ravi = client.get('/yoga')
+
+    assert b'asha' in asha.data and b'ravi' not in asha.data
+    assert b'ravi' in ravi.data and b'asha' not in ravi.data
+    assert b'asha' not in anonymous and b'ravi' not in anonymous
+    assert ravi.headers['ETag'] != asha.headers['ETag']
+    assert ravi.headers['Cache-Control'] == 'private, no-cache'
+    assert 'Cookie' in ravi.headers['Vary']
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_pages_with_flash_messages_bypass_the_cache(client, cache):
+    client.get('/yoga')
+    with client.session_transaction() as session:
+        session['_flashes'] = [('info', 'A one-time notice')]
+    flashed = client.get('/yoga')
+    assert b'A one-time notice' in flashed.data
+    assert 'ETag' not in flashed.headers
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # The notice is shown once and never served from the cache
+    after = client.get('/yoga')
+    assert b'A one-time notice' not in after.data
+    assert cache.hits == 1
+
+
+def test_new_catalog_version_renders_again(client, cache, monkeypatch):
+    client.get('/ayurvedic')
+    monkeypatch.setattr(app.current_catalog(), 'version', 'next-version')
+    client.get('/ayurvedic')
+    assert (cache.hits, cache.misses) == (0, 2)
+    client.get('/ayurvedic')
+    assert cache.hits == 1
+
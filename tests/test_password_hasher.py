@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import app
+
+
+@pytest.fixture
+def release(monkeypatch):
+    """Make hashing block until the returned event is set"""
+    event = threading.Event()
+
+    def blocked(*args):
+        event.wait(5)
+        return 'hashed'
+
+    monkeypatch.setattr(app, 'generate_password_hash', blocked)
+    monkeypatch.setattr(app, 'check_password_hash', blocked)
+    yield event
+    event.set()
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def saturate(hasher):
+    """Fill every admission slot with a blocked hash; returns the waiting threads"""
+    threads = [threading.Thread(target=hasher.hash, args=('secret',)) for _ in range(hasher.max_pending)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: hasher.stats()['pending'] == hasher.max_pending)
+    return threads
+
+
+def test_admission_limit(release):
+    hasher = app.PasswordHasher(workers=1, max_pending=2, timeout=5)
+    threads = saturate(hasher)
+
+    started = time.monotonic()
+    with pytest.raises(app.PasswordHasherBusy):
+        hasher.hash('secret')
+    assert time.monotonic() - started < 1
+    assert hasher.stats()['rejected'] == 1
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    stats = hasher.stats()
+    assert stats['pending'] == 0 and stats['completed'] == 2 and stats['peak_pending'] == 2
+    assert hasher.hash('secret') == 'hashed'
+
+
+def test_timeout_keeps_the_slot_until_the_hash_finishes(release):
+    hasher = app.PasswordHasher(workers=1, max_pending=4, timeout=0.05)
+    with pytest.raises(app.PasswordHasherBusy):
+        hasher.check('pwhash', 'secret')
+    assert hasher.stats()['pending'] == 1
+
+    release.set()
+    wait_for(lambda: hasher.stats()['pending'] == 0)
+    assert hasher.stats()['completed'] == 1
+
+
+@pytest.fixture
+def busy_hasher(storage, monkeypatch, release):
+    """A saturated hashing pool in place of the app's, with one registered user"""
+    storage.add_user({'username': 'asha', 'email': 'asha@example.com',
+                      'password': generate_password_hash('secret1'), 'created_at': None})
+    hasher = app.PasswordHasher(workers=1, max_pending=1, timeout=5)
+    monkeypatch.setattr(app, 'password_hasher', hasher)
+    saturate(hasher)
+    return hasher
+
+
+def test_sign_in_is_refused_when_busy(client, busy_hasher):
+    response = client.post('/login', data={'action': 'signin', 'username': 'asha', 'password': 'secret1'})
+    assert response.status_code == 503
+    assert b'try again in a moment' in response.data
+    with client.session_transaction() as session:
+        assert not session.get('logged_in')
+
+
+def test_sign_up_is_refused_when_busy(client, storage, busy_hasher):
+    response = client.post('/login', data={
+        'action': 'signup', 'signup_username': 'ravi', 'email': 'ravi@example.com',
+        'signup_password': 'secret1', 'confirm_password': 'secret1',
+    })
+    assert response.status_code == 503
+    assert storage.get_user('ravi') is None
+
+
+def test_sign_in_times_out_with_503(client, storage, monkeypatch, release):
+    storage.add_user({'username': 'asha', 'email': 'asha@example.com',
+                      'password': generate_password_hash('secret1'), 'created_at': None})
+    monkeypatch.setattr(app, 'password_hasher', app.PasswordHasher(workers=1, max_pending=4, timeout=0.05))
+    response = client.post('/login', data={'action': 'signin', 'username': 'asha', 'password': 'secret1'})
+    assert response.status_code == 503
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+import app
+
+PROFILE = {'symptoms': ['Stress', 'Back Pain'], 'body_parts': ['Back'], 'experience': 'Beginner',
+           'time_available': '20'}
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """An empty recommendation cache for each test"""
+    cache = app.RecommendationCache()
+    monkeypatch.setattr(app, 'recommendation_cache', cache)
+    return cache
+
+
+def ids(items):
+    return [item['id'] for item in items]
+
+
+def stream(client, payload):
+    response = client.post('/api/recommendations/stream', json=payload)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_stream_sends_each_section_then_done(client):
+    lines = stream(client, PROFILE)
+    assert sorted(line['section'] for line in lines[:-1]) == sorted(app.RECOMMENDATION_SECTIONS)
+    done = lines[-1]
+    assert done['section'] == 'done'
+    assert done['catalog_version'] == app.current_catalog().version
+    assert 'model_metrics' in done
+
+
+def test_stream_matches_the_single_response(client):
+    single = client.post('/api/recommendations', json=PROFILE).get_json()
+    streamed = {line['section']: line['items'] for line in stream(client, PROFILE)[:-1]}
+    for section in app.RECOMMENDATION_SECTIONS:
+        assert ids(streamed[section]) == ids(single[section])
+
+
+@pytest.mark.parametrize('payload', [[], 'Stress', 3])
+def test_stream_rejects_non_objects(client, payload):
+    assert client.post('/api/recommendations/stream', json=payload).status_code == 400
+
+
+def test_repeated_profiles_come_from_the_cache(client, cache):
+    first = client.post('/api/recommendations', json=PROFILE).get_json()
+    # Same symptoms in another order and spelling, body parts in another case
+    reordered = dict(PROFILE, symptoms=['back pain', 'Stress'], body_parts=['back'])
+    second = client.post('/api/recommendations', json=reordered).get_json()
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    for section in app.RECOMMENDATION_SECTIONS:
+        assert ids(second[section]) == ids(first[section])
+
+
+def test_stream_fills_and_reads_the_cache(client, cache):
+    streamed = stream(client, PROFILE)
+    assert cache.stats()['entries'] == 1
+    assert stream(client, PROFILE)[:-1] == streamed[:-1]
+    assert cache.stats()['hits'] == 1
+
+
+def fill(cache, catalog, profile, sections):
+    """Store sections the way a request does: after a lookup missed"""
+    assert cache.get(catalog, profile) is None
+    cache.put(catalog, profile, sections)
+
+
+def test_cache_is_keyed_by_catalog_version(cache):
+    catalog = app.current_catalog()
+    fill(cache, catalog, PROFILE, {'yoga': []})
+    assert cache.get(catalog, PROFILE) == {'yoga': []}
+    assert cache.get(catalog, dict(PROFILE, time_available='21')) is None
+
+    class NewVersion:
+        version = 'next'
+        conditions = catalog.conditions
+    assert cache.get(NewVersion, PROFILE) is None
+    # Moving to a new version drops the old entries
+    assert cache.get(catalog, PROFILE) is None
+
+
+def test_cache_evicts_least_recently_used(cache):
+    catalog = app.current_catalog()
+    cache.max_entries = 2
+    for minutes in ('10', '20', '30'):
+        fill(cache, catalog, dict(PROFILE, time_available=minutes), {'yoga': [minutes]})
+    assert cache.get(catalog, dict(PROFILE, time_available='10')) is None
+    assert cache.get(catalog, dict(PROFILE, time_available='30')) == {'yoga': ['30']}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_entries_are_recomputed(cache, monkeypatch):
+    catalog = app.current_catalog()
+    cache.ttl = 60
+    fill(cache, catalog, PROFILE, {'yoga': []})
+    now = app.time.monotonic()
+    monkeypatch.setattr(app.time, 'monotonic', lambda: now + 61)
+    assert cache.get(catalog, PROFILE) is None
@@ -0,0 +1,40 @@
+import pytest
+
+import run
+
+
+@pytest.fixture
+def requirements(tmp_path):
+    def requirements(*lines):
+        path = tmp_path / 'requirements.txt'
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return str(path)
+    return requirements
+
+
+def test_installed_requirements(requirements):
+    path = requirements('# web framework', 'Flask>=2.0  # comment', '', 'pytest')
+    assert run.requirements_satisfied(path)
+
+
+def test_included_files_are_checked(requirements, tmp_path):
+    (tmp_path / 'other.txt').write_text('pytest\n', encoding='utf-8')
+    assert run.requirements_satisfied(requirements('-r other.txt', 'flask'))
+
+    (tmp_path / 'other.txt').write_text('no-such-package-for-ayushastra\n', encoding='utf-8')
+    assert not run.requirements_satisfied(requirements('--requirement other.txt', 'flask'))
+    assert not run.requirements_satisfied(requirements('-r missing.txt', 'flask'))
+
+
+@pytest.mark.parametrize('option', ['-e .', '--index-url https://pypi.org/simple', '-c constraints.txt'])
+def test_other_pip_options_leave_it_to_pip(requirements, option):
+    assert not run.requirements_satisfied(requirements(option, 'flask'))
+
+
+@pytest.mark.parametrize('line', [
+    'no-such-package-for-ayushastra',
+    'flask<1.0',
+    'flask>=>2',
+])
+def test_unsatisfied_or_unreadable_requirements(requirements, line):
+    assert not run.requirements_satisfied(requirements('pytest', line))
@@ -0,0 +1,106 @@
+import pytest
+
+import app
+
+
+def saved_plans(storage):
+    return storage.get_user_recommendations('tester')
+
+
+def test_save_requires_login(client, storage):
+    response = client.post('/api/save_recommendations', json={'yoga': []})
+    assert response.status_code == 401
+    assert saved_plans(storage) == []
+
+
+@pytest.mark.parametrize('payload', [{}, [], 'plan', 0])
+def test_save_without_data(logged_in_client, storage, payload):
+    response = logged_in_client.post('/api/save_recommendations', json=payload)
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+    assert saved_plans(storage) == []
+
+
+def test_save_stores_compact_plan(logged_in_client, storage):
+    yoga = app.current_catalog().yoga_poses[0]
+    response = logged_in_client.post('/api/save_recommendations', json={
+        'profile': {'symptoms': ['Stress'], 'time_available': '15', 'password': 'not saved'},
+        'items': {'yoga': [{'id': yoga['id'], 'score': 0.8}, 'not an item', {'score': 1}]},
+        'mantras': [{'id': 'Om', 'score': 0.5}],
+    })
+    assert response.status_code == 200 and response.get_json()['success']
+
+    [plan] = saved_plans(storage)
+    assert plan['schema'] == app.SAVED_PLAN_SCHEMA
+    assert plan['profile'] == {'symptoms': ['Stress'], 'time_available': '15'}
+    assert plan['items'] == {'yoga': [{'id': str(yoga['id']), 'score': 0.8}], 'remedies': [], 'pranayama': []}
+    assert plan['saved_at']
+
+
+def test_save_accepts_full_items(logged_in_client, storage):
+    """The older payload posted whole catalog items at the top level"""
+    yoga = dict(app.current_catalog().yoga_poses[0], confidence_score=0.9)
+    response = logged_in_client.post('/api/save_recommendations', json={'symptoms': ['Stress'], 'yoga': [yoga]})
+    assert response.status_code == 200
+
+    [plan] = saved_plans(storage)
+    assert plan['profile'] == {'symptoms': ['Stress']}
+    assert plan['items']['yoga'] == [{'id': str(yoga['id']), 'score': 0.9}]
+
+
+@pytest.mark.parametrize('payload', [
+    {'yoga': 5},
+    {'items': {'yoga': {'id': 'tree'}}},
+    {'mantras': {'id': 'Om'}},
+    {'remedies': 'tulsi', 'pranayama': [None, 3]},
+])
+def test_save_ignores_malformed_sections(logged_in_client, storage, payload):
+    response = logged_in_client.post('/api/save_recommendations', json=payload)
+    assert response.status_code == 200
+
+    [plan] = saved_plans(storage)
+    assert plan['items'] == {'yoga': [], 'remedies': [], 'pranayama': []}
+    assert plan['mantras'] == []
+
+
+def test_saved_plan_is_listed(logged_in_client, storage):
+    yoga = app.current_catalog().yoga_poses[0]
+    logged_in_client.post('/api/save_recommendations', json={'items': {'yoga': [{'id': yoga['id'], 'score': 0.8}]}})
+    response = logged_in_client.get('/api/my-recommendations')
+    assert response.status_code == 200
+    # Listed plans carry the catalog items again
+    [plan] = response.get_json()['plans']
+    assert plan['yoga'][0]['id'] == yoga['id']
+    assert plan['yoga'][0]['name'] == yoga['name']
+
+
+def save_plans(storage, count):
+    for day in range(1, count + 1):
+        storage.add_user_recommendation('tester', {'saved_at': f'2024-01-{day:02d}T00:00:00', 'items': {}})
+
+
+def test_saved_plans_are_paged(logged_in_client, storage):
+    save_plans(storage, 3)
+    first = logged_in_client.get('/my-recommendations?limit=2').get_data(as_text=True)
+    assert 'before=2024-01-02T00:00:00' in first
+    assert 'Newest Plans' not in first
+
+    last = logged_in_client.get('/my-recommendations?limit=2&before=2024-01-02T00:00:00').get_data(as_text=True)
+    assert 'Newest Plans' in last
+    assert 'Older Plans' not in last
+
+
+def test_page_past_the_last_plan_links_back(logged_in_client, storage):
+    save_plans(storage, 2)
+    response = logged_in_client.get('/my-recommendations?before=2024-01-01T00:00:00')
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert 'No Older Plans' in page
+    assert 'Newest Plans' in page
+    assert 'No Saved Plans Yet' not in page
+
+
+def test_no_saved_plans(logged_in_client, storage):
+    page = logged_in_client.get('/my-recommendations').get_data(as_text=True)
+    assert 'No Saved Plans Yet' in page
+    assert 'Newest Plans' not in page and 'Older Plans' not in page
@@ -0,0 +1,107 @@
+import importlib.util
+import json
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def search(client):
+    def search(**params):
+        response = client.get('/api/search', query_string=params)
+        assert response.status_code == 200
+        return response.get_json()
+    return search
+
+
+def names(items):
+    return [item['name'] for item in items]
+
+
+def test_empty_query(search):
+    result = search(q='  ')
+    assert result['yoga'] == result['remedies'] == result['pranayama'] == []
+    assert result['next_cursor'] is None
+
+
+def test_search_matches_names_and_conditions(search):
+    result = search(q='tulsi')
+    assert result['total'] == {'yoga': 0, 'remedies': 1, 'pranayama': 0}
+    assert 'tulsi' in result['remedies'][0]['name'].lower()
+
+    result = search(q='back pain', limit=100)
+    assert result['total']['yoga'] == len(result['yoga']) > 0
+    for item in result['yoga']:
+        text = json.dumps(item).lower()
+        assert 'back' in text and 'pain' in text
+
+
+def test_pages_follow_the_ranking(search):
+    everything = search(q='back pain', limit=100)
+    first = search(q='back pain', limit=5)
+    assert names(first['yoga']) == names(everything['yoga'][:5])
+
+    second = search(q='back pain', limit=5, cursor=first['next_cursor'])
+    assert names(second['yoga']) == names(everything['yoga'][5:10])
+    assert names(search(q='back pain', limit=5, offset=5)['yoga']) == names(second['yoga'])
+
+
+def test_last_page_has_no_cursor(search):
+    total = search(q='back pain')['total']['yoga']
+    assert search(q='back pain', limit=5, offset=total - 1)['next_cursor'] is None
+
+
+def test_invalid_cursor(client):
+    response = client.get('/api/search', query_string={'q': 'pain', 'cursor': 'not a cursor!'})
+    assert response.status_code == 400
+
+
+def test_category_filter(search):
+    result = search(q='pain', category='Pain Relief', limit=100)
+    assert result['yoga']
+    assert all(item['category'] == 'Pain Relief' for item in result['yoga'])
+
+
+def test_slim_view(search):
+    full = search(q='back pain', limit=3)['yoga']
+    slim = search(q='back pain', limit=3, view='slim')['yoga']
+    assert names(slim) == names(full)
+    assert set(slim[0]) <= set(full[0])
+
+
+def test_misspelling_falls_back_to_fuzzy_matches(search):
+    result = search(q='strss')
+    assert result['approximate']
+    assert result['yoga'] and result['pranayama']
+    assert search(q='strss', fuzzy='off')['total'] == {'yoga': 0, 'remedies': 0, 'pranayama': 0}
+
+
+def test_exact_matches_skip_the_fallback(search):
+    exact = search(q='stress')
+    assert not exact['approximate']
+    # A filter that removes every exact match does not turn on fuzzy matching
+    filtered = search(q='pain', category='No such category')
+    assert not filtered['approximate']
+    assert filtered['total'] == {'yoga': 0, 'remedies': 0, 'pranayama': 0}
+
+
+def test_blend_keeps_exact_matches_first(search):
+    exact = search(q='stress', limit=5)
+    blended = search(q='stress', limit=5, fuzzy='blend')
+    assert blended['approximate']
+    assert names(blended['yoga']) == names(exact['yoga'])
+
+
+def test_invalid_fuzzy_mode(client):
+    response = client.get('/api/search', query_string={'q': 'stress', 'fuzzy': 'always'})
+    assert response.status_code == 400
+
+
+def test_unknown_fuzzy_setting_falls_back(monkeypatch):
+    monkeypatch.setenv('SEARCH_FUZZY', 'sometimes')
+    monkeypatch.setenv('LAZY_STARTUP', '1')
+    spec = importlib.util.spec_from_file_location('app_fuzzy_setting', app.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.SEARCH_FUZZY_DEFAULT == 'fallback'
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    """A static/ tree of its own, without a build manifest"""
+    root = tmp_path / 'static'
+    (root / 'audio').mkdir(parents=True)
+    (root / 'audio' / 'om.mp3').write_bytes(bytes(range(256)) * 4)
+    (root / 'style.css').write_text('body { color: #333; }', encoding='utf-8')
+    monkeypatch.setattr(app, 'static_assets', app.StaticAssets(str(root), str(tmp_path / 'manifest.json')))
+    return root
+
+
+def url(filename):
+    with app.app.test_request_context():
+        return app.asset_url(filename)
+
+
+def test_hashed_url_serves_the_file(client, static_dir):
+    css_url = url('style.css')
+    assert css_url.startswith('/assets/') and css_url.endswith('/style.css')
+    response = client.get(css_url)
+    assert response.status_code == 200
+    assert response.data == b'body { color: #333; }'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+def test_range_request(client, static_dir):
+    response = client.get(url('audio/om.mp3'), headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.data == bytes(range(10, 20))
+
+
+def test_conditional_request(client, static_dir):
+    first = client.get(url('style.css'))
+    again = client.get(url('style.css'), headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_edited_file_gets_a_new_url(client, static_dir):
+    old_url = url('style.css')
+    path = static_dir / 'style.css'
+    path.write_text('body { color: #000; }', encoding='utf-8')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    new_url = url('style.css')
+    assert new_url != old_url
+    response = client.get(old_url)
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(new_url)
+
+
+@pytest.mark.parametrize('filename', ['missing.css', '../manifest.json'])
+def test_unknown_files(client, static_dir, filename):
+    assert client.get(f'/assets/0123456789abcdef/{filename}').status_code == 404
+    # Files that cannot be hashed fall back to the plain static URL
+    assert url(filename).startswith('/static/')
@@ -0,0 +1,92 @@
+import pytest
+
+import app
+
+
+def make_backend(kind, tmp_path):
+    if kind == 'json':
+        return app.JSONStorage(str(tmp_path / 'users.json'), str(tmp_path / 'user_recommendations.json'),
+                               str(tmp_path / 'user_recommendations.jsonl'))
+    return app.SQLiteStorage(str(tmp_path / 'ayushastra.db'))
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def backend(request, tmp_path):
+    storage = make_backend(request.param, tmp_path)
+    storage.initialize()
+    return storage
+
+
+def user(username, email):
+    return {'username': username, 'email': email, 'password': 'hash', 'created_at': '2024-01-01T00:00:00'}
+
+
+def plan(saved_at, name):
+    return {'saved_at': saved_at, 'name': name, 'yoga': [{'id': 'tree'}]}
+
+
+def test_users(backend):
+    assert backend.add_user(user('Asha', 'Asha@Example.com'))
+    assert backend.add_user(user('ravi', 'ravi@example.com'))
+    # Usernames and emails are unique regardless of case and spaces
+    assert not backend.add_user(user(' asha ', 'other@example.com'))
+    assert not backend.add_user(user('other', 'asha@example.com'))
+
+    assert backend.get_user('Asha')['email'] == 'Asha@Example.com'
+    assert backend.get_user('nobody') is None
+    assert backend.username_taken('ASHA')
+    assert not backend.username_taken('nobody')
+    assert backend.find_user_by_email(' ASHA@example.com ')['username'] == 'Asha'
+    assert backend.email_registered('ravi@example.com')
+    assert not backend.email_registered('nobody@example.com')
+    assert sorted(backend.load_users()) == ['Asha', 'ravi']
+
+
+def test_save_users_replaces_all(backend):
+    backend.add_user(user('asha', 'asha@example.com'))
+    backend.save_users({'ravi': user('ravi', 'ravi@example.com')})
+    assert list(backend.load_users()) == ['ravi']
+    assert not backend.username_taken('asha')
+
+
+def test_saved_plans(backend):
+    for day in (1, 2, 3, 4):
+        backend.add_user_recommendation('asha', plan(f'2024-01-0{day}T00:00:00', f'plan {day}'))
+    backend.add_user_recommendation('ravi', plan('2024-01-05T00:00:00', 'ravi plan'))
+
+    assert [p['name'] for p in backend.get_user_recommendations('asha')] == ['plan 1', 'plan 2', 'plan 3', 'plan 4']
+    assert backend.get_user_recommendations('nobody') == []
+
+    plans, has_more = backend.get_user_recommendations_page('asha', 2)
+    assert [p['name'] for p in plans] == ['plan 4', 'plan 3'] and has_more
+    plans, has_more = backend.get_user_recommendations_page('asha', 2, offset=2)
+    assert [p['name'] for p in plans] == ['plan 2', 'plan 1'] and not has_more
+    plans, has_more = backend.get_user_recommendations_page('asha', 2, before='2024-01-03T00:00:00')
+    assert [p['name'] for p in plans] == ['plan 2', 'plan 1'] and not has_more
+
+    data = backend.load_user_recommendations()
+    assert sorted(data) == ['asha', 'ravi']
+    assert data['ravi'] == [plan('2024-01-05T00:00:00', 'ravi plan')]
+
+
+def test_save_user_recommendations_replaces_all(backend):
+    backend.add_user_recommendation('asha', plan('2024-01-01T00:00:00', 'old'))
+    backend.save_user_recommendations({'ravi': [plan('2024-01-02T00:00:00', 'new')]})
+    assert backend.get_user_recommendations('asha') == []
+    assert backend.load_user_recommendations() == {'ravi': [plan('2024-01-02T00:00:00', 'new')]}
+
+
+def test_backends_agree(tmp_path):
+    """The same calls leave both backends with the same data"""
+    backends = [make_backend(kind, tmp_path) for kind in ('json', 'sqlite')]
+    for backend in backends:
+        backend.initialize()
+        backend.add_user(user('asha', 'asha@example.com'))
+        backend.add_user(user('ASHA', 'second@example.com'))
+        for day in (3, 1, 2):
+            backend.add_user_recommendation('asha', plan(f'2024-01-0{day}T00:00:00', f'plan {day}'))
+    json_backend, sqlite_backend = backends
+    assert json_backend.load_users() == sqlite_backend.load_users()
+    assert json_backend.load_user_recommendations() == sqlite_backend.load_user_recommendations()
+    assert (json_backend.get_user_recommendations_page('asha', 2)
+            == sqlite_backend.get_user_recommendations_page('asha', 2))
@@ -0,0 +1,42 @@
+import pytest
+
+
+def suggestions(client, **params):
+    response = client.get('/api/suggest', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()['suggestions']
+
+
+def test_suggestions_start_with_the_query(client):
+    results = suggestions(client, q='ba')
+    assert 0 < len(results) <= 8
+    assert all(any(word.startswith('ba') for word in s['text'].lower().split()) for s in results)
+    back_pain = next(s for s in results if s['text'] == 'Back Pain')
+    assert back_pain['kind'] == 'condition'
+    assert back_pain['weight'] == sum(back_pain['counts'].values())
+
+
+def test_kind_and_limit(client):
+    results = suggestions(client, q='ba', kind='name', limit=2)
+    assert len(results) == 2
+    assert {s['kind'] for s in results} == {'name'}
+
+
+def test_no_match(client):
+    assert suggestions(client, q='zzzz') == []
+
+
+def test_invalid_kind(client):
+    assert client.get('/api/suggest', query_string={'q': 'ba', 'kind': 'mantra'}).status_code == 400
+
+
+def test_conditional_get(client):
+    first = client.get('/api/suggest', query_string={'q': 'ba'})
+    assert first.headers['Cache-Control'] == 'public, max-age=300'
+    again = client.get('/api/suggest', query_string={'q': 'ba'}, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+@pytest.mark.parametrize('query', ['BA', ' ba'])
+def test_query_case_and_spaces_are_ignored(client, query):
+    assert suggestions(client, q=query) == suggestions(client, q='ba')